@@ -0,0 +1,51 @@
+# app/ai_analysis/analyzers.py
+"""Pluggable analysis models for the AI worker.
+
+An analyzer is any class with a no-argument constructor and the two batch
+methods below; AI_ANALYZER names it as "module:Class". The worker builds one
+instance per pool process, so heavy models load once per process.
+"""
+import importlib
+from typing import Protocol
+
+
+class Analyzer(Protocol):
+    def classify_texts(self, texts: list[str]) -> list[tuple[dict, float | None]]:
+        """One (result, confidence) per text, in order."""
+
+    def ocr(self, images: list[bytes]) -> list[tuple[dict, float | None]]:
+        """One (result, confidence) per image, in order."""
+
+
+def load_analyzer(path: str) -> Analyzer:
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+class KeywordAnalyzer:
+    """Local stand-in: keyword-vote text classification and a no-op OCR."""
+
+    KEYWORDS = {
+        "road": ["도로", "파손", "포트홀", "보도", "블록", "신호등", "road", "pothole"],
+        "lighting": ["가로등", "조명", "streetlight"],
+        "parking": ["주차", "parking"],
+        "environment": ["쓰레기", "투기", "악취", "소음", "trash", "noise"],
+        "safety": ["위험", "안전", "붕괴", "danger"],
+    }
+
+    def classify_texts(self, texts: list[str]) -> list[tuple[dict, float | None]]:
+        out = []
+        for text in texts:
+            lowered = (text or "").lower()
+            votes = {label: sum(lowered.count(k) for k in words) for label, words in self.KEYWORDS.items()}
+            total = sum(votes.values())
+            if not total:
+                out.append(({"label": "other", "scores": {}}, 0.0))
+                continue
+            label = max(votes, key=votes.get)
+            scores = {k: round(v / total, 4) for k, v in votes.items() if v}
+            out.append(({"label": label, "scores": scores}, scores[label]))
+        return out
+
+    def ocr(self, images: list[bytes]) -> list[tuple[dict, float | None]]:
+        return [({"text": "", "bytes": len(data)}, None) for data in images]
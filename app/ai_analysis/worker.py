@@ -0,0 +1,337 @@
+# app/ai_analysis/worker.py
+"""Background worker that fills `ai_analysis` for submitted complaints.
+
+Each round claims up to AI_BATCH_SIZE SUBMITTED complaints that have no
+TEXT_CLASSIFICATION row yet (FOR UPDATE SKIP LOCKED, so several workers can
+run side by side) by inserting a PENDING marker as that row, and commits at
+once: no complaint lock is held while the batch is analyzed. Text is then
+classified and image files OCR'd in a process pool, and a second short
+transaction fills in the markers and inserts the OCR rows with one multi-row
+INSERT. Markers of a worker that died are claimed again after
+AI_CLAIM_TIMEOUT.
+
+A complaint or image that fails (unreadable object, analyzer error) gets a
+result of {"error": ...} instead, so it is not claimed again and never
+holds up the rest of the queue.
+
+Runs inside the API when AI_WORKER_ENABLED is set, or standalone:
+
+    python -m app.ai_analysis.worker
+"""
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing
+from decimal import Decimal
+
+from sqlalchemy import select, insert, update, delete, exists, and_, or_, bindparam, func
+from starlette.concurrency import run_in_threadpool
+
+from app.ai_analysis.analyzers import load_analyzer
+from app.config import settings
+from app.db import get_db, complaints, files as files_table, ai_analysis
+from app.utils.db_clock import seconds_ago
+
+# ---- Pool process side ---------------------------------------------------
+_analyzer = None
+
+
+def _init_process(path: str) -> None:
+    global _analyzer
+    _analyzer = load_analyzer(path)
+
+
+def _failed(e: BaseException) -> tuple[dict, None]:
+    return {"error": f"{type(e).__name__}: {e}"}, None
+
+
+def _per_item(method, items: list) -> list:
+    """Batch call; if it raises, retry item by item so only the bad inputs fail."""
+    try:
+        return method(items)
+    except Exception:
+        out = []
+        for item in items:
+            try:
+                out.append(method([item])[0])
+            except Exception as e:
+                out.append(_failed(e))
+        return out
+
+
+def _classify(texts: list[str]) -> list:
+    return _per_item(_analyzer.classify_texts, texts)
+
+
+def _ocr(images: list[bytes]) -> list:
+    return _per_item(_analyzer.ocr, images)
+
+
+# ---- Metrics -------------------------------------------------------------
+class AnalysisMetrics:
+    """Throughput and lag (complaint created_at -> analysis written) counters."""
+
+    def __init__(self):
+        self.batches = 0
+        self.complaints = 0
+        self.results = 0
+        self.item_errors = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.last_batch_at: float | None = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, complaints: int, results: int, errors: int, seconds: float, lags: list[float]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.complaints += complaints
+            self.results += results
+            self.item_errors += errors
+            self.busy_seconds += seconds
+            self.last_batch_at = time.time()
+            if lags:
+                self.last_lag = max(lags)
+                self.max_lag = max(self.max_lag, self.last_lag)
+                self._lag_total += sum(lags)
+
+    def failed(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "complaints": self.complaints,
+                "results": self.results,
+                "item_errors": self.item_errors,
+                "failures": self.failures,
+                "complaints_per_sec": self.complaints / self.busy_seconds if self.busy_seconds else 0.0,
+                "avg_lag_sec": self._lag_total / self.complaints if self.complaints else 0.0,
+                "last_lag_sec": self.last_lag,
+                "max_lag_sec": self.max_lag,
+                "last_batch_at": self.last_batch_at,
+            }
+
+
+# ---- Worker --------------------------------------------------------------
+def _confidence(value: float | None) -> Decimal | None:
+    return None if value is None else Decimal(str(round(value, 4)))
+
+
+class AnalysisWorker:
+    def __init__(self):
+        self.metrics = AnalysisMetrics()
+        self._pool: ProcessPoolExecutor | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = asyncio.Event()
+
+    def _pending_query(self):
+        marker = ai_analysis.c.result["status"].as_string()
+        classified = exists().where(and_(
+            ai_analysis.c.complaint_id == complaints.c.complaint_id,
+            ai_analysis.c.analysis_type == "TEXT_CLASSIFICATION",
+            # A PENDING marker only counts while its claim is fresh
+            or_(func.coalesce(marker, "") != "PENDING", ai_analysis.c.created_at > seconds_ago(settings.AI_CLAIM_TIMEOUT)),
+        ))
+        # Give attachments uploaded right after creation time to land (DB clock, like created_at)
+        settled = seconds_ago(settings.AI_ANALYSIS_DELAY)
+        return (
+            select(
+                complaints.c.complaint_id,
+                complaints.c.original_text,
+                complaints.c.created_at,
+                func.now().label("claimed_at"),
+            )
+            .where(complaints.c.status == "SUBMITTED", complaints.c.created_at <= settled, ~classified)
+            .order_by(complaints.c.complaint_id)
+            .limit(settings.AI_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+
+    async def _in_pool(self, fn, arg):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, arg)
+
+    async def _claim(self, db) -> tuple[list, str]:
+        """Mark a batch as being analyzed and commit; returns the rows and the claim token."""
+        token = uuid.uuid4().hex
+        try:
+            result = await db.execute(self._pending_query())
+            batch = result.mappings().all()
+            if batch:
+                ids = [r["complaint_id"] for r in batch]
+                # Stale markers of a dead worker are replaced
+                await db.execute(delete(ai_analysis).where(
+                    ai_analysis.c.complaint_id.in_(ids),
+                    ai_analysis.c.analysis_type == "TEXT_CLASSIFICATION",
+                ))
+                await db.execute(insert(ai_analysis), [
+                    {
+                        "complaint_id": cid,
+                        "analysis_type": "TEXT_CLASSIFICATION",
+                        "result": {"status": "PENDING", "claim": token},
+                    }
+                    for cid in ids
+                ])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return batch, token
+
+    async def _analyze(self, db, batch: list) -> list[dict]:
+        """Classification results (one per complaint) and OCR rows, outside any transaction."""
+        ids = [r["complaint_id"] for r in batch]
+        rows = []
+        labels = await self._in_pool(_classify, [r["original_text"] or "" for r in batch])
+        for r, (res, conf) in zip(batch, labels):
+            rows.append({
+                "complaint_id": r["complaint_id"],
+                "analysis_type": "TEXT_CLASSIFICATION",
+                "result": res,
+                "confidence_score": _confidence(conf),
+            })
+
+        if settings.AI_OCR_ENABLED:
+            result = await db.execute(
+                select(files_table)
+                .where(files_table.c.complaint_id.in_(ids), files_table.c.file_type == "IMAGE")
+                .order_by(files_table.c.file_id)
+            )
+            images = result.mappings().all()
+            await db.rollback()
+            if images:
+                from app.routes.files import read_object
+
+                blobs = await asyncio.gather(*(
+                    run_in_threadpool(read_object, f["minio_bucket"], f["minio_object_key"])
+                    for f in images
+                ), return_exceptions=True)
+                readable = [b for b in blobs if not isinstance(b, BaseException)]
+                texts = iter(await self._in_pool(_ocr, readable) if readable else [])
+                for f, blob in zip(images, blobs):
+                    res, conf = _failed(blob) if isinstance(blob, BaseException) else next(texts)
+                    rows.append({
+                        "complaint_id": f["complaint_id"],
+                        "analysis_type": "OCR",
+                        "result": {"file_id": f["file_id"], **res},
+                        "confidence_score": _confidence(conf),
+                    })
+        return rows
+
+    async def _store(self, db, rows: list[dict], token: str) -> list[dict]:
+        """Fill in the markers still held by this claim and insert OCR rows; returns what was written."""
+        try:
+            result = await db.execute(
+                select(ai_analysis.c.analysis_id, ai_analysis.c.complaint_id)
+                .where(
+                    ai_analysis.c.complaint_id.in_({r["complaint_id"] for r in rows}),
+                    ai_analysis.c.analysis_type == "TEXT_CLASSIFICATION",
+                    ai_analysis.c.result["claim"].as_string() == token,
+                )
+                .with_for_update()
+            )
+            # Complaints deleted (or re-claimed after a timeout) meanwhile are dropped
+            markers = {r["complaint_id"]: r["analysis_id"] for r in result.mappings()}
+            rows = [r for r in rows if r["complaint_id"] in markers]
+            labels = [r for r in rows if r["analysis_type"] == "TEXT_CLASSIFICATION"]
+            if labels:
+                await db.execute(
+                    update(ai_analysis)
+                    .where(ai_analysis.c.analysis_id == bindparam("aid"))
+                    .values(result=bindparam("res"), confidence_score=bindparam("conf"), created_at=func.now()),
+                    [
+                        {"aid": markers[r["complaint_id"]], "res": r["result"], "conf": r["confidence_score"]}
+                        for r in labels
+                    ],
+                )
+            ocr = [r for r in rows if r["analysis_type"] == "OCR"]
+            if ocr:
+                await db.execute(ai_analysis.insert(), ocr)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return rows
+
+    async def run_once(self) -> int:
+        """Analyze one batch; returns the number of complaints handled."""
+        start = time.perf_counter()
+        async with aclosing(get_db()) as sessions:
+            db = await anext(sessions)
+            try:
+                batch, token = await self._claim(db)
+                if not batch:
+                    return 0
+                rows = await self._store(db, await self._analyze(db, batch), token)
+            except Exception:
+                self.metrics.failed()
+                raise
+
+        elapsed = time.perf_counter() - start
+        errors = sum(1 for r in rows if "error" in r["result"])
+        lags = [(r["claimed_at"] - r["created_at"]).total_seconds() + elapsed for r in batch if r["created_at"]]
+        self.metrics.record(len(batch), len(rows), errors, elapsed, lags)
+        print(f"[DEBUG] 🤖 Analyzed {len(batch)} complaints ({len(rows)} results, {errors} errors)")
+        return len(batch)
+
+    async def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                print(f"[ERROR] AI analysis batch failed: {e}")
+                handled = 0
+            if handled < settings.AI_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), settings.AI_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start_pool(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.AI_WORKER_PROCESSES,
+                initializer=_init_process,
+                initargs=(settings.AI_ANALYZER,),
+            )
+
+    def start(self) -> None:
+        self.start_pool()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+analysis_worker = AnalysisWorker()
+
+
+async def _main() -> None:
+    from database.registry import registry
+
+    analysis_worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await analysis_worker.stop()
+        await registry.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
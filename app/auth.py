@@ -1,6 +1,7 @@
+import json
 import os
 import time
-import httpx
+from contextlib import aclosing
 from datetime import datetime, timedelta
 from types import SimpleNamespace
 from urllib.parse import urlencode
@@ -9,14 +10,16 @@ from fastapi import APIRouter, Request, Depends
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.exceptions import HTTPException
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, delete, func
 
 from authlib.integrations.starlette_client import OAuth
 from cryptography.fernet import Fernet
 
 from app.config import settings
-from app.utils.auth_utils import decode_access_token
+from app.utils.auth_utils import decode_access_token, token_cache
+from app.utils.keycloak_http import KeycloakHTTP
+from app.utils.single_flight import SingleFlight, get_lock_backend
 
 
 from app.db import get_db, users as users_table, user_tokens as user_tokens_table
@@ -25,6 +28,14 @@ os.environ["AUTHLIB_INSECURE_TRANSPORT"] = "1"
 
 router = APIRouter()
 
+token_refresh_flight = SingleFlight(
+    get_lock_backend(settings.TOKEN_REFRESH_LOCK_BACKEND, settings.TOKEN_REFRESH_LOCK_TIMEOUT),
+    result_ttl=settings.TOKEN_REFRESH_RESULT_TTL,
+    namespace="minwon:refresh",
+    # Tokens shared with other workers are stored encrypted
+    codec=(lambda v: encrypt_token(json.dumps(v)), lambda s: json.loads(decrypt_token(s))),
+)
+
 def get_cipher_suite():
     return Fernet(settings.encryption_key)
 
@@ -34,13 +45,12 @@ class ReauthRequired(Exception):
         self.next_url = next_url
 
 # Initialize OAuth client using Keycloak metadata
-async def init_oauth() -> OAuth:
+async def init_oauth(http: KeycloakHTTP) -> OAuth:
     metadata_url = f"{settings.ISSUER_BASE_URL}/.well-known/openid-configuration"
     try:
-        async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
-            response = await client.get(metadata_url)
-            response.raise_for_status()
-            metadata = response.json()
+        response = await http.client.get(metadata_url)
+        response.raise_for_status()
+        metadata = response.json()
 
         oauth = OAuth()
         oauth.register(
@@ -51,8 +61,10 @@ async def init_oauth() -> OAuth:
             access_token_url=metadata["token_endpoint"],
             refresh_token_url=metadata["token_endpoint"],
             userinfo_url=metadata["userinfo_endpoint"],
+            userinfo_endpoint=metadata["userinfo_endpoint"],
             jwks_uri=metadata.get("jwks_uri"),
-            client_kwargs={"scope": "openid email profile", "verify": False},
+            # Authlib's per-call clients ride on the shared Keycloak connection pool
+            client_kwargs={"scope": "openid email profile", **http.client_kwargs()},
         )
 
         print("[DEBUG] ✅ OAuth registered successfully!")
@@ -71,10 +83,10 @@ def decrypt_token(encrypted_token: str) -> str:
     return cipher_suite.decrypt(encrypted_token.encode()).decode()
 
 # Refresh token 
-async def save_refresh_token(db: Session, user_id: int, refresh_token: str, device_info: str | None = None) -> None:
+async def save_refresh_token(db: AsyncSession, user_id: int, refresh_token: str, device_info: str | None = None) -> None:
     try:
         # delete existing record for same (user, device)
-        db.execute(
+        await db.execute(
             delete(user_tokens_table).where(
                 user_tokens_table.c.user_id == user_id,
                 user_tokens_table.c.device_info == device_info
@@ -85,7 +97,7 @@ async def save_refresh_token(db: Session, user_id: int, refresh_token: str, devi
         # prefer DB time: use Python time consistently here (column is DATETIME)
         expires_at = datetime.now() + timedelta(days=30)
 
-        db.execute(
+        await db.execute(
             insert(user_tokens_table).values(
                 user_id=user_id,
                 refresh_token_encrypted=encrypted_token,
@@ -93,28 +105,25 @@ async def save_refresh_token(db: Session, user_id: int, refresh_token: str, devi
                 device_info=device_info,
             )
         )
-        db.commit()
+        await db.commit()
         print(f"[DEBUG] ✅ Refresh token saved for user {user_id}")
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"[ERROR] Failed to save refresh token: {e}")
         raise
 
-async def get_refresh_token(db: Session, user_id: int, device_info: str | None = None) -> str | None:
+async def get_refresh_token(db: AsyncSession, user_id: int, device_info: str | None = None) -> str | None:
     try:
-        row = (
-            db.execute(
-                select(user_tokens_table)
-                .where(
-                    user_tokens_table.c.user_id == user_id,
-                    user_tokens_table.c.device_info == device_info,
-                    user_tokens_table.c.expires_at > func.now(),
-                )
+        result = await db.execute(
+            select(user_tokens_table)
+            .where(
+                user_tokens_table.c.user_id == user_id,
+                user_tokens_table.c.device_info == device_info,
+                user_tokens_table.c.expires_at > func.now(),
             )
-            .mappings()
-            .first()
         )
+        row = result.mappings().first()
         if not row:
             return None
         return decrypt_token(row["refresh_token_encrypted"])
@@ -122,32 +131,35 @@ async def get_refresh_token(db: Session, user_id: int, device_info: str | None =
         print(f"[ERROR] Failed to get refresh token: {e}")
         return None
 
-async def delete_refresh_token(db: Session, user_id: int, device_info: str | None = None) -> None:
+async def delete_refresh_token(db: AsyncSession, user_id: int, device_info: str | None = None) -> None:
     try:
-        db.execute(
+        await db.execute(
             delete(user_tokens_table).where(
                 user_tokens_table.c.user_id == user_id,
                 user_tokens_table.c.device_info == device_info
             )
         )
-        db.commit()
+        await db.commit()
         print(f"[DEBUG] ✅ Refresh token deleted for user {user_id}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"[ERROR] Failed to delete refresh token: {e}")
 
 
-async def get_or_create_user(db: Session, keycloak_user: dict) -> SimpleNamespace:
+async def delete_all_refresh_tokens(db: AsyncSession, user_id: int) -> None:
+    await db.execute(delete(user_tokens_table).where(user_tokens_table.c.user_id == user_id))
+    await db.commit()
+    print(f"[DEBUG] ✅ All refresh tokens deleted for user {user_id}")
+
+
+async def get_or_create_user(db: AsyncSession, keycloak_user: dict) -> SimpleNamespace:
     kc_id = keycloak_user.get("sub")
     email = keycloak_user.get("email")
 
-    row = (
-        db.execute(
-            select(users_table).where(users_table.c.keycloak_user_id == kc_id)
-        )
-        .mappings()
-        .first()
+    result = await db.execute(
+        select(users_table).where(users_table.c.keycloak_user_id == kc_id)
     )
+    row = result.mappings().first()
     if row:
         print(f"[DEBUG] Existing user found: {email}")
         return SimpleNamespace(**row)
@@ -156,7 +168,7 @@ async def get_or_create_user(db: Session, keycloak_user: dict) -> SimpleNamespac
     given_name  = keycloak_user.get("given_name", "") or ""
     display_name = f"{family_name}{given_name}".strip() or (keycloak_user.get("name") or email or kc_id)
 
-    res = db.execute(
+    res = await db.execute(
         insert(users_table).values(
             keycloak_user_id=kc_id,
             email=email,
@@ -166,66 +178,77 @@ async def get_or_create_user(db: Session, keycloak_user: dict) -> SimpleNamespac
             deleted_at=None,
         )
     )
-    db.commit()
+    await db.commit()
 
     user_id = res.inserted_primary_key[0]
-    new_row = (
-        db.execute(
-            select(users_table).where(users_table.c.user_id == user_id)
-        )
-        .mappings()
-        .first()
+    result = await db.execute(
+        select(users_table).where(users_table.c.user_id == user_id)
     )
+    new_row = result.mappings().first()
     print(f"[DEBUG] New user created: {email}")
     return SimpleNamespace(**new_row)
 
-# Attempt to refresh access token using refresh_token from DB
-async def refresh_access_token(request: Request, db: Session) -> bool:
+async def _refresh_tokens(client, user_id: int, device_info: str) -> dict | None:
+    """One refresh_token grant against Keycloak; returns the new session token or None."""
+    # Own session: the flight may outlive the request that started it
+    async with aclosing(get_db()) as sessions:
+        db = await anext(sessions)
+        refresh_token = await get_refresh_token(db, user_id, device_info)
+        if not refresh_token:
+            return None
+
+        resp = await client.post(
+            f"{settings.ISSUER_BASE_URL}/protocol/openid-connect/token",
+            data={
+                "grant_type": "refresh_token",
+                "client_id": settings.CLIENT_ID,
+                "client_secret": settings.CLIENT_SECRET,
+                "refresh_token": refresh_token,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        resp.raise_for_status()
+        token = resp.json()
+
+        print("[DEBUG] 🔁 Token refreshed successfully")
+
+        new_refresh_token = token.get("refresh_token")
+        if new_refresh_token:
+            await save_refresh_token(db, user_id, new_refresh_token, device_info)
+
+    return {
+        "access_token": token["access_token"],
+        "expires_at": int(time.time()) + token.get("expires_in", 300),
+    }
+
+# Attempt to refresh access token using refresh_token from DB.
+# Concurrent requests from the same user/device share one refresh.
+async def refresh_access_token(request: Request, db: AsyncSession) -> bool:
     user_session = request.session.get("user")
     if not user_session:
         return False
 
     try:
-        # find user by email
-        row = (
-            db.execute(
-                select(users_table).where(users_table.c.email == user_session["email"])
+        user_id = user_session.get("user_id")
+        if user_id is None:
+            # find user by email
+            result = await db.execute(
+                select(users_table.c.user_id).where(users_table.c.email == user_session["email"])
             )
-            .mappings()
-            .first()
-        )
-        if not row:
-            return False
+            user_id = result.scalar()
+            if user_id is None:
+                return False
 
         device_info = request.headers.get("user-agent", "unknown")[:100]
-        refresh_token = await get_refresh_token(db, row["user_id"], device_info)
-        if not refresh_token:
+        client = request.app.state.keycloak_http.client
+        new_token = await token_refresh_flight.do(
+            (user_id, device_info),
+            lambda: _refresh_tokens(client, user_id, device_info),
+        )
+        if not new_token:
             return False
 
-        async with httpx.AsyncClient(verify=False) as client:
-            resp = await client.post(
-                f"{settings.ISSUER_BASE_URL}/protocol/openid-connect/token",
-                data={
-                    "grant_type": "refresh_token",
-                    "client_id": settings.CLIENT_ID,
-                    "client_secret": settings.CLIENT_SECRET,
-                    "refresh_token": refresh_token,
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
-            resp.raise_for_status()
-            token = resp.json()
-
-        print("[DEBUG] 🔁 Token refreshed successfully")
-
-        new_refresh_token = token.get("refresh_token")
-        if new_refresh_token:
-            await save_refresh_token(db, row["user_id"], new_refresh_token, device_info)
-
-        request.session["token"] = {
-            "access_token": token["access_token"],
-            "expires_at": int(time.time()) + token.get("expires_in", 300),
-        }
+        request.session["token"] = new_token
         return True
 
     except Exception as e:
@@ -233,6 +256,38 @@ async def refresh_access_token(request: Request, db: Session) -> bool:
         request.session.clear()
         return False
 
+def _session_refresh_key(request: Request) -> tuple | None:
+    user_id = (request.session.get("user") or {}).get("user_id")
+    if user_id is None:
+        return None
+    return user_id, request.headers.get("user-agent", "unknown")[:100]
+
+# Adopt a token that a background refresh already fetched for this user/device
+def adopt_refreshed_token(request: Request) -> bool:
+    key = _session_refresh_key(request)
+    if key is None:
+        return False
+    new_token = token_refresh_flight.peek(key)
+    current = request.session.get("token") or {}
+    if not new_token or new_token["expires_at"] <= current.get("expires_at", 0):
+        return False
+    request.session["token"] = new_token
+    return True
+
+# Start a refresh without blocking the current request, which keeps using its
+# still-valid token; the result is kept until the old token would have expired
+def refresh_in_background(request: Request) -> None:
+    key = _session_refresh_key(request)
+    if key is None:
+        return
+    user_id, device_info = key
+    client = request.app.state.keycloak_http.client
+    token_refresh_flight.start(
+        key,
+        lambda: _refresh_tokens(client, user_id, device_info),
+        result_ttl=settings.TOKEN_REFRESH_WINDOW + settings.TOKEN_REFRESH_RESULT_TTL,
+    )
+
 
 @router.get("/login")
 async def login(request: Request, next: str | None = None):
@@ -248,7 +303,7 @@ async def login(request: Request, next: str | None = None):
 
 # Handles Keycloak OAuth2 callback and saves user session
 @router.get("/callback")
-async def callback(request: Request, db: Session = Depends(get_db)):
+async def callback(request: Request, db: AsyncSession = Depends(get_db)):
     oauth = request.app.state.oauth
     try:
         print("[DEBUG] Callback started")
@@ -290,12 +345,13 @@ async def callback(request: Request, db: Session = Depends(get_db)):
 
 # Redirects to Keycloak logout endpoint and clears session
 @router.get("/logout")
-async def logout(request: Request, db: Session = Depends(get_db)):
+async def logout(request: Request, db: AsyncSession = Depends(get_db)):
     user_session = request.session.get("user")
     id_token = request.cookies.get("id_token")
     if user_session and user_session.get("user_id"):
         device_info = request.headers.get("user-agent", "unknown")[:100]
         await delete_refresh_token(db, user_session["user_id"], device_info)
+        token_refresh_flight.forget((user_session["user_id"], device_info))
 
     request.session.clear()
 
@@ -316,22 +372,49 @@ async def logout(request: Request, db: Session = Depends(get_db)):
     response.delete_cookie("id_token")
     return response
 
+# Signs the user out on every device: drops all their server-side sessions
+# and stored refresh tokens, so no other session can refresh either
+@router.post("/logout-all")
+async def logout_all(request: Request, db: AsyncSession = Depends(get_db)):
+    user_session = request.session.get("user")
+    if not user_session or not user_session.get("user_id"):
+        raise HTTPException(status_code=401, detail="Not logged in")
+    user_id = user_session["user_id"]
+
+    await delete_all_refresh_tokens(db, user_id)
+    store = getattr(request.app.state, "session_store", None)
+    revoked = await store.revoke_user(user_id) if store is not None else 0
+    request.session.clear()
+    print(f"[DEBUG] Revoked {revoked} sessions for user {user_id}")
+
+    response = JSONResponse(content={"revoked_sessions": revoked})
+    response.delete_cookie("minwon_session", path="/")
+    response.delete_cookie("id_token")
+    return response
+
 @router.get("/logged-out")
 async def logged_out():
     return RedirectResponse(settings.BASE_URL + "/")
 
 # Extracts current user from session or bearer token
-async def get_current_user(request: Request, db: Session = Depends(get_db)):
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
     user = request.session.get("user")
     token_data = request.session.get("token")
 
     if user and token_data:
-        if token_data.get("expires_at") and time.time() >= token_data["expires_at"]:
-            if not await refresh_access_token(request, db):
+        expires_at = token_data.get("expires_at")
+        now = time.time()
+        if expires_at and now >= expires_at - settings.TOKEN_REFRESH_WINDOW:
+            if adopt_refreshed_token(request):
+                pass
+            elif now < expires_at:
+                refresh_in_background(request)
+            elif not await refresh_access_token(request, db):
                 raise ReauthRequired(settings.BASE_URL + "/api/userinfo")
+            token_data = request.session["token"]
 
         try:
-            payload = decode_access_token(token_data["access_token"])
+            payload = await decode_access_token(token_data["access_token"])
             roles = payload.get("realm_access", {}).get("roles", [])
         except Exception as e:
             print(f"[WARN] Failed to decode access token: {e}")
@@ -351,7 +434,7 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)):
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header.split(" ")[1]
         try:
-            payload = decode_access_token(token)
+            payload = await decode_access_token(token)
         except Exception as e:
             raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
@@ -375,13 +458,19 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)):
 
     raise HTTPException(status_code=401, detail="Authentication required")
 
+# Gate for debug and stats endpoints: realm role settings.ADMIN_ROLE required
+async def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    if settings.ADMIN_ROLE not in (user.get("roles") or []):
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
+
 # Returns current user info from session or token
 @router.get("/userinfo")
 async def userinfo(request: Request, user: dict = Depends(get_current_user)):
     return JSONResponse(content={"user": user})
 
 # Debug helper to inspect session content
-@router.get("/session-debug")
+@router.get("/session-debug", dependencies=[Depends(require_admin)])
 async def session_debug(request: Request):
     return {
         "session_keys": list(request.session.keys()),
@@ -389,6 +478,8 @@ async def session_debug(request: Request):
         "token_in_session": "token" in request.session,
         "has_refresh_token_in_session": False,
         "id_token": request.cookies.get("id_token"),
+        "token_cache": token_cache.stats(),
+        "token_refresh": token_refresh_flight.stats(),
     }
 
 # Get access token
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, BigInteger, Enum, Text, String, Integer, ForeignKey
+from sqlalchemy import Column, BigInteger, Enum, Text, String, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
 import enum
 from app.common.base_model import BaseModel
 
@@ -18,6 +19,15 @@ class ComplaintStatus(enum.Enum):
 
 class Complaint(BaseModel):
     __tablename__ = "complaints"
+    __table_args__ = (
+        # Keyset pagination for per-user listing
+        Index("ix_complaints_user_created", "user_id", "created_at", "complaint_id"),
+        # Department inbox, with and without a status filter
+        Index("ix_complaints_dept_status_created", "department_id", "status", "created_at", "complaint_id"),
+        Index("ix_complaints_dept_created", "department_id", "created_at", "complaint_id"),
+        # Full-text search over app-generated bigram tokens (app.utils.search_text)
+        Index("ft_complaints_search", "search_ngrams", mysql_prefix="FULLTEXT"),
+    )
 
     complaint_id = Column(BigInteger, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, ForeignKey("users.user_id"), nullable=False, index=True)
@@ -29,6 +39,7 @@ class Complaint(BaseModel):
     category_id = Column(Integer, ForeignKey("categories.category_id"), nullable=True, index=True)
     department_id = Column(Integer, ForeignKey("departments.department_id"), nullable=True, index=True)
     status = Column(Enum(ComplaintStatus), default=ComplaintStatus.DRAFT, nullable=False, index=True)
+    search_ngrams = Column(Text().with_variant(MEDIUMTEXT(), "mysql", "mariadb"), nullable=True)
 
     user = relationship("User", back_populates="complaints")
     category = relationship("Category", back_populates="complaints")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, BigInteger, Date, Integer, String
+from database.mariadb_connection import MariaDBBase
+
+
+class ComplaintDailyStat(MariaDBBase):
+    """Complaint counts per (day, status, category, department), kept up to date
+    by the complaint write paths (app.utils.complaint_stats)."""
+
+    __tablename__ = "complaint_stats_daily"
+
+    day = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    # 0 = no category / department (primary key columns can't be NULL)
+    category_id = Column(Integer, primary_key=True, default=0)
+    department_id = Column(Integer, primary_key=True, default=0)
+    count = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ComplaintDailyStat(day={self.day}, status='{self.status}', count={self.count})>"
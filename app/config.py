@@ -18,6 +18,19 @@ class Settings(BaseSettings):
     ISSUER_BASE_URL: str
     SESSION_SECRET: str
     DATABASE_URL: str = ""
+    # "sync" (Session in the threadpool) or "async" (AsyncSession over aiomysql)
+    DB_MODE: str = "sync"
+    ASYNC_DATABASE_URL: str = ""
+    # Connection pool (per engine, per worker)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_ECHO: bool = False
+    # "models" (declarative models only) or "reflect" (also reflect the live schema at startup)
+    DB_SCHEMA_SOURCE: str = "models"
+    # Refuse to start while the live schema lacks tables/columns the models declare (see database.migrate)
+    DB_SCHEMA_CHECK: bool = True
     MARIADB_USER: str
     MARIADB_PASSWORD: str
     MARIADB_HOST: str
@@ -33,9 +46,94 @@ class Settings(BaseSettings):
     MINIO_ACCESS_KEY: str            
     MINIO_SECRET_KEY: str            
     MINIO_BUCKET: str = "minwon"
+    # Max concurrent MinIO puts per upload request
+    UPLOAD_CONCURRENCY: int = 4
+    # Streaming uploads: per-file size limit and MinIO multipart part size (bytes)
+    MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024
+    UPLOAD_PART_SIZE: int = 5 * 1024 * 1024
+    # Downloads: "proxy" streams through the API, "redirect"/"url" use presigned GETs
+    FILE_DOWNLOAD_MODE: str = "proxy"
+    PRESIGNED_URL_EXPIRES: int = 300
+    # Image derivatives served by ?size=: longest edge (px) per size name
+    THUMBNAIL_ENABLED: bool = True
+    THUMBNAIL_SIZES: dict[str, int] = {"thumb": 320, "preview": 1280}
+    # "WEBP" or "JPEG"; quality 1-100
+    THUMBNAIL_FORMAT: str = "WEBP"
+    THUMBNAIL_QUALITY: int = 80
+    THUMBNAIL_PROCESSES: int = 2
+    # MinIO garbage collection (app.utils.object_gc): tombstoned objects are removed
+    # GC_GRACE_SECONDS after queueing, GC_BATCH_SIZE per multi-delete, at most GC_RATE objects/sec.
+    # Needs the object_tombstones table (python -m database.reconcile_objects creates it)
+    GC_ENABLED: bool = False
+    GC_BATCH_SIZE: int = 500
+    GC_RATE: float = 200.0
+    GC_GRACE_SECONDS: int = 300
+    GC_POLL_INTERVAL: float = 30.0
+    # Reconciliation scan: unreferenced objects younger than this are left alone (in-flight uploads)
+    GC_ORPHAN_MIN_AGE: int = 24 * 60 * 60
+
+    # Keycloak realm roles: admins see every department inbox, staff only the
+    # departments they hold a "<prefix><department_id>" role for
+    ADMIN_ROLE: str = "admin"
+    STAFF_ROLE: str = "staff"
+    DEPARTMENT_ROLE_PREFIX: str = "department:"
+
+    # Max complaints per POST /api/complaints/bulk
+    BULK_MAX_ITEMS: int = 500
+
+    # Rows per server-side cursor fetch (and file lookup) in complaint exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # AI analysis worker (app.ai_analysis.worker)
+    AI_WORKER_ENABLED: bool = False
+    AI_ANALYZER: str = "app.ai_analysis.analyzers:KeywordAnalyzer"
+    AI_BATCH_SIZE: int = 32
+    AI_WORKER_PROCESSES: int = 2
+    AI_POLL_INTERVAL: float = 5.0
+    # Seconds after creation before a complaint is analyzed (lets attachments land)
+    AI_ANALYSIS_DELAY: int = 30
+    # Seconds before a claimed batch whose worker died (PENDING marker left behind) is claimed again
+    AI_CLAIM_TIMEOUT: int = 600
+    AI_OCR_ENABLED: bool = True
 
     TOKEN_ENCRYPTION_KEY: str = ""
 
+    # Sessions: "cookie" (signed cookie), "redis" (shared KV) or "memory" (per-process LRU;
+    # single-process dev only: other workers and restarts lose the session, incl. OAuth state)
+    SESSION_BACKEND: str = "cookie"
+    SESSION_TTL: int = 14 * 24 * 60 * 60
+    SESSION_MAX_ENTRIES: int = 10000
+    SESSION_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Shared Keycloak HTTP client (seconds / connections)
+    KEYCLOAK_CONNECT_TIMEOUT: float = 5.0
+    KEYCLOAK_READ_TIMEOUT: float = 10.0
+    KEYCLOAK_MAX_CONNECTIONS: int = 20
+    KEYCLOAK_MAX_KEEPALIVE: int = 10
+    KEYCLOAK_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Token refresh single-flight: "local" (per worker) or "mariadb" (GET_LOCK across workers,
+    # refreshed tokens shared through the single_flight_results table)
+    TOKEN_REFRESH_LOCK_BACKEND: str = "local"
+    TOKEN_REFRESH_LOCK_TIMEOUT: int = 10
+    # Refresh session tokens in the background this many seconds before expiry (0 = off)
+    TOKEN_REFRESH_WINDOW: int = 60
+    # Reuse a just-refreshed token for requests that raced the refresh (seconds)
+    TOKEN_REFRESH_RESULT_TTL: float = 5.0
+
+    # JWKS signing key cache (seconds)
+    JWKS_CACHE_TTL: int = 3600
+    JWKS_MIN_REFRESH_INTERVAL: int = 30
+
+    # Verified access token LRU (entries)
+    TOKEN_CACHE_SIZE: int = 4096
+
+    # Categories/departments snapshot (seconds)
+    REFERENCE_CACHE_TTL: int = 300
+    REFERENCE_CACHE_MAX_AGE: int = 60
+    # Background reload of that snapshot; picks up edits made outside the API (0 = off)
+    REFERENCE_CACHE_REFRESH_INTERVAL: float = 60.0
+
     class Config:
         env_file = ENV_PATH
         env_file_encoding = "utf-8"
@@ -49,6 +147,17 @@ class Settings(BaseSettings):
     def mariadb_url(self) -> str:
         return f'mysql+pymysql://{self.MARIADB_USER}:{self.MARIADB_PASSWORD}@{self.MARIADB_HOST}:{self.MARIADB_PORT}/{self.MARIADB_DATABASE}?charset=utf8mb4'
 
+    @property
+    def postgresql_url(self) -> str:
+        return f'postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DATABASE}'
+
+    @property
+    def async_database_url(self) -> str:
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        url = self.DATABASE_URL or self.mariadb_url
+        return url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
     @property
     def encryption_key(self) -> bytes:
         if not self.TOKEN_ENCRYPTION_KEY:
@@ -1,8 +1,8 @@
 from typing import Generator
 from sqlalchemy.orm import Session
 
+from database.registry import registry
 from database.mariadb_connection import (
-    mariadb_engine,
     MariaDBSessionLocal,
     MariaDBBase
 )
@@ -10,15 +10,17 @@ from database.postgresql_connection import (
     PostgreSQLSessionLocal,
 )
 Base = MariaDBBase
-engine = mariadb_engine
 SessionLocal = MariaDBSessionLocal
 from app.user.user_models import User
 from app.category.category_models import Category
 from app.department.department_models import Department
 from app.complaint.complaint_models import Complaint
+from app.complaint.complaint_stats_models import ComplaintDailyStat
 from app.file.file_models import File
+from app.file.tombstone_models import ObjectTombstone
 from app.ai_analysis.ai_models import AIAnalysis
 from app.user_token.token_models import UserToken
+from app.user_token.flight_result_models import SingleFlightResult
 
 def get_mariadb() -> Generator[Session, None, None]:
     db = MariaDBSessionLocal()
@@ -38,7 +40,7 @@ def get_db() -> Generator[Session, None, None]:
 
 def create_mariadb_tables():
     print("🗄️  Creating MariaDB tables...")
-    MariaDBBase.metadata.create_all(bind=mariadb_engine)
+    MariaDBBase.metadata.create_all(bind=registry.engine())
     print("✅ MariaDB tables created successfully!")
 
 
@@ -49,7 +51,7 @@ def create_all_tables():
 
 def drop_mariadb_tables():
     print("⚠️  Dropping MariaDB tables...")
-    MariaDBBase.metadata.drop_all(bind=mariadb_engine)
+    MariaDBBase.metadata.drop_all(bind=registry.engine())
     print("🗑️  MariaDB tables dropped!")
 
 
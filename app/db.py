@@ -1,46 +1,141 @@
 # app/db.py
-import os
-from typing import Iterator
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, MetaData, Table
+from typing import AsyncIterator
+from sqlalchemy import MetaData, Table, Enum, inspect
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.concurrency import run_in_threadpool
 
-load_dotenv()
+from app.config import settings
+from database.registry import registry
+from database.mariadb_connection import MariaDBBase
+# Register every declarative model on MariaDBBase.metadata
+from app.user import user_models  # noqa: F401
+from app.user_token import token_models  # noqa: F401
+from app.user_token import flight_result_models  # noqa: F401
+from app.category import category_models  # noqa: F401
+from app.department import department_models  # noqa: F401
+from app.complaint import complaint_models  # noqa: F401
+from app.complaint import complaint_stats_models  # noqa: F401
+from app.file import file_models  # noqa: F401
+from app.file import tombstone_models  # noqa: F401
+from app.ai_analysis import ai_models  # noqa: F401
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Engines come from the shared registry and are built on first use
+SessionLocal = sessionmaker(autoflush=False, autocommit=False)
 
-# Pre-ping to drop dead connections
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Async sessions (DB_MODE=async) over an async MySQL driver
+AsyncSessionLocal = None
+if settings.DB_MODE == "async":
+    AsyncSessionLocal = async_sessionmaker(
+        class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
 
-# Reflect all tables from the current schema
+# Core tables built from the declarative models (no DB round trip at import).
+# Enum columns are turned into plain string enums so rows carry the same
+# str values live reflection of the MariaDB ENUM columns would give.
 metadata = MetaData()
-metadata.reflect(bind=engine)
+for _model_table in MariaDBBase.metadata.sorted_tables:
+    _table = _model_table.to_metadata(metadata)
+    for _col in _table.columns:
+        if isinstance(_col.type, Enum) and _col.type.enum_class is not None:
+            _col.type = Enum(*_col.type.enums, name=_col.type.name)
 
-def get_db() -> Iterator[Session]:
-    """Yield a DB session with proper close semantics."""
-    db = SessionLocal()
+
+def reflect_schema() -> None:
+    """Add columns that exist in the live schema but not in the models (DB_SCHEMA_SOURCE=reflect).
+
+    Runs once from the app lifespan; existing Column objects are kept.
+    """
+    metadata.reflect(
+        bind=registry.engine(),
+        only=list(metadata.tables),
+        extend_existing=True,
+        autoload_replace=False,
+    )
+
+
+def schema_gaps(engine) -> list[str]:
+    """Tables and columns the models declare that the live database lacks ("table" / "table.column")."""
+    insp = inspect(engine)
+    existing = set(insp.get_table_names())
+    gaps = []
+    for table in MariaDBBase.metadata.sorted_tables:
+        if table.name not in existing:
+            gaps.append(table.name)
+            continue
+        live = {c["name"] for c in insp.get_columns(table.name)}
+        gaps.extend(f"{table.name}.{c.name}" for c in table.columns if c.name not in live)
+    return gaps
+
+
+def check_schema() -> None:
+    """Fail fast at startup (DB_SCHEMA_CHECK) instead of on the first query touching a new column."""
+    gaps = schema_gaps(registry.engine())
+    if gaps:
+        raise RuntimeError(
+            f"[DB] Database schema is behind the models (missing: {', '.join(gaps)}); "
+            "run `python -m database.migrate`"
+        )
+
+
+class SyncSessionAdapter:
+    """AsyncSession-compatible facade over a sync Session (DB_MODE=sync).
+
+    Every call runs in the threadpool so blocking driver I/O never stalls
+    the event loop.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def bind(self):
+        return self.sync_session.get_bind()
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Yield a DB session for the configured DB_MODE with proper close semantics."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal(bind=registry.async_engine()) as db:
+            yield db
+        return
+
+    db = SyncSessionAdapter(SessionLocal(bind=registry.engine()))
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 def get_required_table(name: str) -> Table:
-    """Return a reflected Table or raise a clear error if missing."""
+    """Return a Table or raise a clear error if missing."""
     tbl = metadata.tables.get(name)
     if tbl is None:
         raise RuntimeError(f"[DB] Required table not found: {name}")
     return tbl
 
-# Convenience bindings 
+# Convenience bindings
 complaints: Table   = get_required_table("complaints")
 files: Table        = get_required_table("files")
 categories: Table   = get_required_table("categories")
 departments: Table  = get_required_table("departments")
 users: Table        = get_required_table("users")
 user_tokens: Table  = get_required_table("user_tokens")
-ai_analysis: Table  = get_required_table("ai_analysis")
\ No newline at end of file
+ai_analysis: Table  = get_required_table("ai_analysis")
+complaint_stats: Table = get_required_table("complaint_stats_daily")
+object_tombstones: Table = get_required_table("object_tombstones")
+single_flight_results: Table = get_required_table("single_flight_results")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, Enum, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Enum, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.mariadb_connection import MariaDBBase
@@ -21,8 +21,14 @@ class File(MariaDBBase):
     stored_filename = Column(String(255), nullable=False, unique=True)
     file_type = Column(Enum(FileType), nullable=False)
     minio_bucket = Column(String(100), nullable=False)
-    minio_object_key = Column(String(500), nullable=False, unique=True)
+    # Hashed uploads point at the content-addressed blobs/<sha256>, shared by every row with that digest;
+    # the reaper (app.utils.object_gc) only removes a blob once no row references it
+    minio_object_key = Column(String(500), nullable=False, index=True)
+    # SHA-256 of the content (hex); NULL for presigned uploads, which are not hashed or deduplicated
+    content_sha256 = Column(String(64), nullable=True, index=True)
     uploaded_at = Column(DateTime, default=func.now(), nullable=False)
+    # Downscaled image derivatives: {size: {"key", "content_type", "width", "height", "bytes"}}
+    variants = Column(JSON, nullable=True)
 
     complaint = relationship("Complaint", back_populates="files")
 
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+from typing import Optional
 from app.file.file_models import FileType
 
 
@@ -23,6 +24,7 @@ class FileResponse(FileBase):
     stored_filename: str
     file_url: str
     uploaded_at: datetime
+    variants: Optional[dict] = None
 
 
 class FileListResponse(BaseModel):
@@ -31,4 +33,5 @@ class FileListResponse(BaseModel):
     file_id: int
     original_filename: str
     file_type: FileType
-    uploaded_at: datetime
\ No newline at end of file
+    uploaded_at: datetime
+    variants: Optional[dict] = None
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime
+from sqlalchemy.sql import func
+from database.mariadb_connection import MariaDBBase
+
+
+class ObjectTombstone(MariaDBBase):
+    """A MinIO object queued for removal, drained in batches by the object
+    reaper (app.utils.object_gc). The object is only removed if no `files` row
+    references it (or, for a variant, its original) by then."""
+
+    __tablename__ = "object_tombstones"
+
+    tombstone_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    minio_bucket = Column(String(100), nullable=False)
+    minio_object_key = Column(String(500), nullable=False, index=True)
+    # Reaped GC_GRACE_SECONDS after this; pushed forward when a removal fails
+    queued_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+
+    def __repr__(self):
+        return f"<ObjectTombstone(id={self.tombstone_id}, key='{self.minio_object_key}')>"
@@ -1,23 +1,54 @@
 # app/main.py
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 from fastapi.responses import RedirectResponse
 from starlette.middleware.sessions import SessionMiddleware
 #from fastapi.middleware.cors import CORSMiddleware
-from app.auth import router as auth_router, init_oauth, ReauthRequired
+from app.auth import router as auth_router, init_oauth, ReauthRequired, require_admin
 #from app.routes import 
 from app.config import settings
 from urllib.parse import quote
 from contextlib import asynccontextmanager
 from fastapi.openapi.utils import get_openapi
 from app.routes import complaints_router, files_router, categories_router, departments_router
+from database.registry import registry
+from app.db import reflect_schema, check_schema
+from app.routes.files import ensure_bucket
+from starlette.concurrency import run_in_threadpool
+from app.utils.keycloak_http import keycloak_http
+from app.utils.session_store import create_session_store
+from app.utils.session_middleware import ServerSessionMiddleware
+from app.ai_analysis.worker import analysis_worker
+from app.utils.thumbnails import thumbnail_pipeline
+from app.utils.object_gc import object_reaper
+from app.utils.reference_cache import reference_cache
 
 # from app.database import MariaDBBase, mariadb_engine
 # MariaDBBase.metadata.create_all(bind=mariadb_engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.oauth = await init_oauth()
+    keycloak_http.start()
+    app.state.keycloak_http = keycloak_http
+    app.state.oauth = await init_oauth(keycloak_http)
+    if settings.DB_SCHEMA_CHECK:
+        await run_in_threadpool(check_schema)
+    if settings.DB_SCHEMA_SOURCE == "reflect":
+        await run_in_threadpool(reflect_schema)
+    await run_in_threadpool(ensure_bucket)
+    if settings.AI_WORKER_ENABLED:
+        analysis_worker.start()
+    if settings.GC_ENABLED:
+        object_reaper.start()
+    reference_cache.start()
     yield
+    await reference_cache.stop()
+    await object_reaper.stop()
+    await analysis_worker.stop()
+    await run_in_threadpool(thumbnail_pipeline.shutdown)
+    await keycloak_http.aclose()
+    if session_store is not None:
+        await session_store.aclose()
+    await registry.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -35,13 +66,27 @@ async def reauth_redirect_handler(request: Request, exc: ReauthRequired):
 #     allow_headers=["*"],
 # )
 
-app.add_middleware(
-    SessionMiddleware,
-    secret_key=settings.SESSION_SECRET,
-    same_site="lax",
-    session_cookie="minwon_session",
-    https_only=False,
-)
+session_store = None
+if settings.SESSION_BACKEND == "cookie":
+    app.add_middleware(
+        SessionMiddleware,
+        secret_key=settings.SESSION_SECRET,
+        same_site="lax",
+        session_cookie="minwon_session",
+        https_only=False,
+    )
+else:
+    # Server-side sessions: the cookie only carries an opaque session id
+    session_store = create_session_store()
+    app.state.session_store = session_store
+    app.add_middleware(
+        ServerSessionMiddleware,
+        store=session_store,
+        session_cookie="minwon_session",
+        max_age=settings.SESSION_TTL,
+        same_site="lax",
+        https_only=False,
+    )
 
 app.include_router(auth_router, prefix="/api", tags=["auth"])
 app.include_router(complaints_router, prefix="/api/complaints", tags=["complaint"])
@@ -79,4 +124,30 @@ def root():
     return {"message": "Welcome to the Minwoneasy!"}
 
 
+# Operational stats; they describe the whole deployment, so admins only
+@app.get("/health/db", include_in_schema=False, dependencies=[Depends(require_admin)])
+def db_pool_stats():
+    return registry.pool_stats()
+
+
+@app.get("/health/ai", include_in_schema=False, dependencies=[Depends(require_admin)])
+def ai_worker_stats():
+    return analysis_worker.metrics.snapshot()
+
+
+@app.get("/health/thumbnails", include_in_schema=False, dependencies=[Depends(require_admin)])
+def thumbnail_stats():
+    return thumbnail_pipeline.stats()
+
+
+@app.get("/health/gc", include_in_schema=False, dependencies=[Depends(require_admin)])
+def object_gc_stats():
+    return object_reaper.stats()
+
+
+@app.get("/health/keycloak", include_in_schema=False, dependencies=[Depends(require_admin)])
+def keycloak_latency_stats():
+    return keycloak_http.stats()
+
+
 
@@ -1,22 +1,19 @@
 # app/routes/categories.py
 from typing import Dict
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db, categories
+from app.db import get_db
 from app.auth import get_current_user
+from app.utils.reference_cache import reference_cache, cached_json
 
 router = APIRouter()
 
 @router.get("", summary="List complaint categories", tags=["Category"])
-def list_categories(
-    db: Session = Depends(get_db),
+async def list_categories(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     user: Dict = Depends(get_current_user),
 ):
-    rows = (
-        db.execute(select(categories).order_by(categories.c.category_id))
-        .mappings()
-        .all()
-    )
-    return rows
+    snap = await reference_cache.get(db)
+    return cached_json(request, snap.categories)
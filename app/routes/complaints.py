@@ -1,15 +1,37 @@
 # app/routes/complaints.py
-from typing import Optional, Any
-from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, insert, update, delete, func
-from sqlalchemy.orm import Session
+import csv
+import io
+import json
+from collections import Counter
+from datetime import date, datetime
+from typing import Optional, Any, List
+from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert, update, delete, func, cast, BigInteger
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db, complaints, files as files_table, categories, departments
+from app.db import get_db, complaints, complaint_stats, ai_analysis, object_tombstones, files as files_table
 from app.auth import get_current_user
+from app.config import settings
+from app.complaint.complaint_models import ComplaintStatus
+from app.utils.bulk_insert import insert_many
+from app.utils.pagination import keyset_before, keyset_after, page_of, encode_rank_cursor, rank_before
+from app.utils.search_text import SEARCH_FIELDS, search_document, search_query
+from app.utils.complaint_stats import stat_key, stat_deltas, apply_stat_deltas
+from app.utils.reference_cache import reference_cache
+from app.utils.object_gc import tombstones_for
+from database.registry import registry
 
 router = APIRouter()
 
+_STATUSES = {s.value for s in ComplaintStatus}
+_STAT_DIMENSIONS = {"status", "category_id", "department_id", "day"}
+
+# Columns returned to clients (the search token column stays internal)
+_COLUMNS = [c for c in complaints.c if c.key != "search_ngrams"]
+
 # ---------- Request Schemas ----------
 class ComplaintCreate(BaseModel):
     input_text: Optional[str] = None
@@ -20,6 +42,9 @@ class ComplaintCreate(BaseModel):
     # Must be one of: DRAFT | SUBMITTED | PROCESSING | COMPLETED
     status: Optional[str] = "SUBMITTED"
 
+class ComplaintBulkCreate(BaseModel):
+    items: List[ComplaintCreate] = Field(..., min_length=1)
+
 class ComplaintUpdate(BaseModel):
     input_text: Optional[str] = None
     processed_text: Optional[str] = None
@@ -32,30 +57,24 @@ class ComplaintUpdate(BaseModel):
 
 # ---------- Routes ----------
 @router.post("/create", summary="Create a new complaint")
-def create_complaint(
+async def create_complaint(
     payload: ComplaintCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user),
 ):
     # Validate optional foreign keys
     if payload.category_id is not None:
-        exists = db.scalar(
-            select(categories.c.category_id).where(categories.c.category_id == payload.category_id)
-        )
-        if not exists:
+        if not await reference_cache.has_category(db, payload.category_id):
             raise HTTPException(400, "Invalid category_id")
 
     if payload.department_id is not None:
-        exists = db.scalar(
-            select(departments.c.department_id).where(departments.c.department_id == payload.department_id)
-        )
-        if not exists:
+        if not await reference_cache.has_department(db, payload.department_id):
             raise HTTPException(400, "Invalid department_id")
 
     # Decide submission type by presence of text (files -> handled in file upload route)
     submission_type = "TEXT" if payload.input_text else "IMAGE"
 
-    res = db.execute(
+    res = await db.execute(
         insert(complaints).values(
             user_id=user["user_id"],
             submission_type=submission_type,
@@ -66,65 +85,321 @@ def create_complaint(
             category_id=payload.category_id,
             department_id=payload.department_id,
             status=payload.status or "SUBMITTED",
+            search_ngrams=search_document({
+                "original_text": payload.input_text,
+                "location": payload.location,
+                "location_details": payload.location_details,
+            }),
             created_at=func.now(),
             updated_at=func.now(),
         )
     )
-    db.commit()
-    return _get(db, res.inserted_primary_key[0], user["user_id"])
+    await apply_stat_deltas(db, Counter({stat_key({
+        "status": payload.status or "SUBMITTED",
+        "category_id": payload.category_id,
+        "department_id": payload.department_id,
+    }, today=True): 1}))
+    await db.commit()
+    return await _get(db, res.inserted_primary_key[0], user["user_id"])
+
+@router.post("/bulk", summary="Create many complaints in one transaction")
+async def create_complaints_bulk(
+    payload: ComplaintBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    if len(payload.items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(400, f"At most {settings.BULK_MAX_ITEMS} items per request")
+
+    # Validate every foreign key against one reference snapshot (reloaded at most once)
+    snap = await reference_cache.get(db)
+    cat_ids = {i.category_id for i in payload.items if i.category_id is not None}
+    dept_ids = {i.department_id for i in payload.items if i.department_id is not None}
+    if not cat_ids <= snap.category_ids or not dept_ids <= snap.department_by_id.keys():
+        snap = await reference_cache.get(db, force=True)
+
+    results: list[dict] = [{"index": i} for i in range(len(payload.items))]
+    rows: list[dict] = []
+    row_index: list[int] = []
+    for i, item in enumerate(payload.items):
+        status = item.status or "SUBMITTED"
+        if item.category_id is not None and item.category_id not in snap.category_ids:
+            results[i]["error"] = "Invalid category_id"
+        elif item.department_id is not None and item.department_id not in snap.department_by_id:
+            results[i]["error"] = "Invalid department_id"
+        elif status not in _STATUSES:
+            results[i]["error"] = "Invalid status"
+        else:
+            row = {
+                "user_id": user["user_id"],
+                "submission_type": "TEXT" if item.input_text else "IMAGE",
+                "original_text": item.input_text,
+                "processed_text": None,
+                "location": item.location,
+                "location_details": item.location_details,
+                "category_id": item.category_id,
+                "department_id": item.department_id,
+                "status": status,
+            }
+            row["search_ngrams"] = search_document(row)
+            rows.append(row)
+            row_index.append(i)
+
+    # One batched INSERT and one commit for every valid item
+    try:
+        ids = await insert_many(db, complaints, rows)
+        await apply_stat_deltas(db, Counter(stat_key(r, today=True) for r in rows))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"[ERROR] Bulk complaint insert failed: {e}")
+        raise HTTPException(500, "Bulk insert failed; no complaints were created")
+
+    for i, complaint_id in zip(row_index, ids):
+        results[i]["complaint_id"] = complaint_id
+    return {"created": len(ids), "failed": len(results) - len(ids), "results": results}
 
 @router.get("/list", summary="List complaints for the current user")
-def list_my_complaints(
-    db: Session = Depends(get_db),
+async def list_my_complaints(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None, description="DRAFT | SUBMITTED | PROCESSING | COMPLETED"),
+    category_id: Optional[int] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user),
 ):
-    rows = (
-        db.execute(
-            select(complaints)
-            .where(complaints.c.user_id == user["user_id"])
-            .order_by(complaints.c.created_at.desc())
-        )
-        .mappings()
-        .all()
+    # Keyset pagination on (created_at, complaint_id), newest first
+    stmt = select(*_COLUMNS).where(complaints.c.user_id == user["user_id"])
+    if status is not None:
+        stmt = stmt.where(complaints.c.status == status)
+    if category_id is not None:
+        stmt = stmt.where(complaints.c.category_id == category_id)
+    if created_from is not None:
+        stmt = stmt.where(complaints.c.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(complaints.c.created_at < created_to)
+    if cursor:
+        stmt = stmt.where(keyset_before(complaints.c.created_at, complaints.c.complaint_id, cursor))
+
+    result = await db.execute(
+        stmt.order_by(complaints.c.created_at.desc(), complaints.c.complaint_id.desc())
+        .limit(limit + 1)
+    )
+    rows, next_cursor = page_of(result.mappings().all(), limit, "created_at", "complaint_id")
+    return {"items": await _with_files(db, rows), "next_cursor": next_cursor}
+
+@router.get("/search", summary="Full-text search over the current user's complaints")
+async def search_complaints(
+    q: str = Query(..., min_length=1, description="Words to match (Korean bigram matching)"),
+    sort: str = Query("relevance", pattern="^(relevance|recent)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None, description="DRAFT | SUBMITTED | PROCESSING | COMPLETED"),
+    category_id: Optional[int] = Query(None),
+    department_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    against = search_query(q)
+    if against is None:
+        raise HTTPException(400, "Query has no searchable words")
+
+    # FULLTEXT match on the bigram token column; every query bigram is required
+    matched = match(complaints.c.search_ngrams, against=against).in_boolean_mode()
+    # Relevance in millionths as an integer, so the rank cursor compares exactly
+    score = cast(matched * 1_000_000, BigInteger)
+    stmt = (
+        select(*_COLUMNS, score.label("score"))
+        .where(matched, complaints.c.user_id == user["user_id"])
+    )
+    if status is not None:
+        stmt = stmt.where(complaints.c.status == status)
+    if category_id is not None:
+        stmt = stmt.where(complaints.c.category_id == category_id)
+    if department_id is not None:
+        stmt = stmt.where(complaints.c.department_id == department_id)
+
+    if sort == "recent":
+        if cursor:
+            stmt = stmt.where(keyset_before(complaints.c.created_at, complaints.c.complaint_id, cursor))
+        stmt = stmt.order_by(complaints.c.created_at.desc(), complaints.c.complaint_id.desc())
+    else:
+        if cursor:
+            stmt = stmt.where(rank_before(score, complaints.c.complaint_id, cursor))
+        stmt = stmt.order_by(score.desc(), complaints.c.complaint_id.desc())
+
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = result.mappings().all()
+    if sort == "recent":
+        rows, next_cursor = page_of(rows, limit, "created_at", "complaint_id")
+    else:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_rank_cursor(rows[-1]["score"], rows[-1]["complaint_id"])
+    return {"items": await _with_files(db, rows), "next_cursor": next_cursor}
+
+@router.get("/inbox", summary="Complaints routed to a department (staff only)")
+async def department_inbox(
+    department_id: Optional[int] = Query(None, description="Defaults to the caller's only department"),
+    status: Optional[str] = Query(None, description="DRAFT | SUBMITTED | PROCESSING | COMPLETED"),
+    order: str = Query("oldest", pattern="^(oldest|newest)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    department_id = _inbox_department(user, department_id)
+    if not await reference_cache.has_department(db, department_id):
+        raise HTTPException(404, "Department not found")
+
+    result = await db.execute(inbox_query(department_id, status, order, cursor, limit))
+    rows, next_cursor = page_of(result.mappings().all(), limit, "created_at", "complaint_id")
+    return {"items": await _with_files(db, rows), "next_cursor": next_cursor}
+
+@router.get("/export", summary="Stream complaints as NDJSON or CSV (staff only)")
+async def export_complaints(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    department_id: Optional[int] = Query(None, description="Required for staff; admins may omit it to export everything"),
+    status: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    include_files: bool = Query(False),
+    user: dict = Depends(get_current_user),
+):
+    if not (department_id is None and settings.ADMIN_ROLE in (user.get("roles") or [])):
+        department_id = _inbox_department(user, department_id)
+
+    stmt = select(*_COLUMNS)
+    if department_id is not None:
+        stmt = stmt.where(complaints.c.department_id == department_id)
+    if status is not None:
+        stmt = stmt.where(complaints.c.status == status)
+    if created_from is not None:
+        stmt = stmt.where(complaints.c.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(complaints.c.created_at < created_to)
+    stmt = stmt.order_by(complaints.c.complaint_id)
+
+    filename = f"complaints-{datetime.now():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        _export_rows(stmt, fmt, include_files),
+        media_type="application/x-ndjson" if fmt == "ndjson" else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/stats", summary="Complaint counts from the statistics summary table (staff only)")
+async def complaint_stats_summary(
+    group_by: List[str] = Query([], description="Any of: status, category_id, department_id, day"),
+    day_from: Optional[date] = Query(None, description="Inclusive first day"),
+    day_to: Optional[date] = Query(None, description="Exclusive last day"),
+    status: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    department_id: Optional[int] = Query(None, description="Required for staff; admins may omit it for system-wide counts"),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    if not (department_id is None and settings.ADMIN_ROLE in (user.get("roles") or [])):
+        department_id = _inbox_department(user, department_id)
+
+    # Reads the pre-aggregated buckets: cost grows with buckets, not complaints
+    unknown = set(group_by) - _STAT_DIMENSIONS
+    if unknown:
+        raise HTTPException(400, f"Invalid group_by: {', '.join(sorted(unknown))}")
+
+    s = complaint_stats.c
+    conds = []
+    if day_from is not None:
+        conds.append(s.day >= day_from)
+    if day_to is not None:
+        conds.append(s.day < day_to)
+    if status is not None:
+        conds.append(s.status == status)
+    if category_id is not None:
+        conds.append(s.category_id == category_id)
+    if department_id is not None:
+        conds.append(s.department_id == department_id)
+
+    dims = [s[name] for name in dict.fromkeys(group_by)]
+    total = func.sum(s.count)
+    result = await db.execute(
+        select(*dims, total.label("count"))
+        .where(*conds)
+        .group_by(*dims)
+        .having(total != 0)
+        .order_by(*dims)
     )
-    return [_with_files(db, r) for r in rows]
+    buckets = []
+    for r in result.mappings().all():
+        b = dict(r)
+        b["count"] = int(b["count"])
+        for key in ("category_id", "department_id"):
+            if b.get(key) == 0:
+                b[key] = None
+        buckets.append(b)
+    return {"total": sum(b["count"] for b in buckets), "buckets": buckets}
 
 @router.get("/{complaint_id}", summary="Get complaint details")
-def get_complaint(
+async def get_complaint(
     complaint_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user),
 ):
-    return _get(db, complaint_id, user["user_id"])
+    return await _get(db, complaint_id, user["user_id"])
+
+@router.get("/{complaint_id}/analysis", summary="AI analysis results for a complaint")
+async def get_complaint_analysis(
+    complaint_id: int,
+    analysis_type: Optional[str] = Query(None, description="TEXT_CLASSIFICATION | IMAGE_CLASSIFICATION | OCR"),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    result = await db.execute(
+        select(complaints.c.user_id, complaints.c.department_id)
+        .where(complaints.c.complaint_id == complaint_id)
+    )
+    comp = result.mappings().first()
+    if not comp:
+        raise HTTPException(404, "Complaint not found")
+    if comp["user_id"] != user.get("user_id"):
+        # Staff of the routed department (or admins) may read it too
+        if comp["department_id"] is None:
+            raise HTTPException(404, "Complaint not found")
+        try:
+            _inbox_department(user, comp["department_id"])
+        except HTTPException:
+            raise HTTPException(404, "Complaint not found")
+
+    stmt = select(ai_analysis).where(ai_analysis.c.complaint_id == complaint_id)
+    if analysis_type is not None:
+        stmt = stmt.where(ai_analysis.c.analysis_type == analysis_type)
+    result = await db.execute(stmt.order_by(ai_analysis.c.analysis_id))
+    return {"complaint_id": complaint_id, "items": [dict(r) for r in result.mappings().all()]}
 
 @router.put("/{complaint_id}", summary="Update a complaint")
-def update_complaint(
+async def update_complaint(
     complaint_id: int,
     payload: ComplaintUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user),
 ):
-    row = (
-        db.execute(select(complaints).where(complaints.c.complaint_id == complaint_id))
-        .mappings()
-        .first()
+    # Row lock: the stats delta below depends on the old status/category/department
+    result = await db.execute(
+        select(complaints).where(complaints.c.complaint_id == complaint_id).with_for_update()
     )
+    row = result.mappings().first()
     if not row or row["user_id"] != user["user_id"]:
         raise HTTPException(404, "Complaint not found")
 
     # Validate optional foreign keys
     if payload.category_id is not None:
-        exists = db.scalar(
-            select(categories.c.category_id).where(categories.c.category_id == payload.category_id)
-        )
-        if not exists:
+        if not await reference_cache.has_category(db, payload.category_id):
             raise HTTPException(400, "Invalid category_id")
 
     if payload.department_id is not None:
-        exists = db.scalar(
-            select(departments.c.department_id).where(departments.c.department_id == payload.department_id)
-        )
-        if not exists:
+        if not await reference_cache.has_department(db, payload.department_id):
             raise HTTPException(400, "Invalid department_id")
 
     # Build update payload
@@ -147,7 +422,7 @@ def update_complaint(
     # If text changed, re-evaluate submission type with file existence
     if "original_text" in values:
         has_file = (
-            db.scalar(
+            await db.scalar(
                 select(func.count())
                 .select_from(files_table)
                 .where(files_table.c.complaint_id == complaint_id)
@@ -156,54 +431,150 @@ def update_complaint(
         )
         values["submission_type"] = "TEXT_IMAGE" if has_file else "TEXT"
 
-    db.execute(
+    # Keep the search document in step with the searchable fields
+    if any(f in values for f in SEARCH_FIELDS):
+        values["search_ngrams"] = search_document({**row, **values})
+
+    await db.execute(
         update(complaints)
         .where(complaints.c.complaint_id == complaint_id)
         .values(**values)
     )
-    db.commit()
-    return _get(db, complaint_id, user["user_id"])
+    await apply_stat_deltas(db, stat_deltas(row, {**row, **values}))
+    await db.commit()
+    return await _get(db, complaint_id, user["user_id"])
 
 @router.delete("/{complaint_id}", status_code=204, summary="Delete a complaint")
-def delete_complaint(
+async def delete_complaint(
     complaint_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user),
 ):
-    row = (
-        db.execute(select(complaints).where(complaints.c.complaint_id == complaint_id))
-        .mappings()
-        .first()
+    result = await db.execute(
+        select(complaints).where(complaints.c.complaint_id == complaint_id).with_for_update()
     )
+    row = result.mappings().first()
     if not row or row["user_id"] != user["user_id"]:
         raise HTTPException(404, "Complaint not found")
 
-    db.execute(delete(complaints).where(complaints.c.complaint_id == complaint_id))
-    db.commit()
+    # MinIO objects are queued for the reaper (app.utils.object_gc), not removed inline
+    result = await db.execute(
+        select(files_table.c.minio_bucket, files_table.c.minio_object_key, files_table.c.variants)
+        .where(files_table.c.complaint_id == complaint_id)
+    )
+    tombstones = tombstones_for(result.mappings().all())
+    await db.execute(delete(files_table).where(files_table.c.complaint_id == complaint_id))
+    await db.execute(delete(ai_analysis).where(ai_analysis.c.complaint_id == complaint_id))
+    await db.execute(delete(complaints).where(complaints.c.complaint_id == complaint_id))
+    if tombstones:
+        await db.execute(insert(object_tombstones), tombstones)
+    await apply_stat_deltas(db, stat_deltas(old=row))
+    await db.commit()
 
 # ---------- Internal helpers ----------
-def _with_files(db: Session, row: dict) -> dict:
-    """Attach file list to a complaint row."""
-    fs = (
-        db.execute(
-            select(files_table)
-            .where(files_table.c.complaint_id == row["complaint_id"])
-            .order_by(files_table.c.uploaded_at.desc())
-        )
-        .mappings()
-        .all()
+def _inbox_department(user: dict, department_id: Optional[int]) -> int:
+    """Resolve and authorize the department for the inbox from the caller's realm roles."""
+    roles = set(user.get("roles") or [])
+    prefix = settings.DEPARTMENT_ROLE_PREFIX
+    if settings.ADMIN_ROLE in roles:
+        if department_id is None:
+            raise HTTPException(400, "department_id is required")
+        return department_id
+
+    if settings.STAFF_ROLE not in roles:
+        raise HTTPException(403, "Staff role required")
+    mine = {int(r[len(prefix):]) for r in roles if r.startswith(prefix) and r[len(prefix):].isdigit()}
+    if department_id is None:
+        if len(mine) != 1:
+            raise HTTPException(400, "department_id is required")
+        return next(iter(mine))
+    if department_id not in mine:
+        raise HTTPException(403, "Not a member of this department")
+    return department_id
+
+def _export_rows(stmt, fmt: str, include_files: bool):
+    """Encode an export chunk by chunk (blocking; StreamingResponse runs it in the threadpool).
+
+    Rows come from a server-side cursor in EXPORT_BATCH_SIZE partitions, so
+    memory stays flat whatever the row count. File metadata is fetched per
+    partition on a second connection (an unbuffered cursor owns its own).
+    """
+    batch = settings.EXPORT_BATCH_SIZE
+    engine = registry.engine()
+    columns = [c.key for c in _COLUMNS] + (["files"] if include_files else [])
+    with engine.connect() as conn, engine.connect() as files_conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch).execute(stmt)
+        if fmt == "csv":
+            yield ("\ufeff" + ",".join(columns) + "\r\n").encode()
+
+        for part in result.mappings().partitions():
+            grouped = {}
+            if include_files:
+                ids = [r["complaint_id"] for r in part]
+                grouped = {cid: [] for cid in ids}
+                for f in files_conn.execute(
+                    select(files_table).where(files_table.c.complaint_id.in_(ids)).order_by(files_table.c.file_id)
+                ).mappings():
+                    grouped[f["complaint_id"]].append(dict(f))
+
+            buf = io.StringIO()
+            writer = csv.writer(buf) if fmt == "csv" else None
+            for r in part:
+                d = dict(r)
+                if include_files:
+                    d["files"] = grouped[r["complaint_id"]]
+                if writer is None:
+                    buf.write(json.dumps(d, default=str, ensure_ascii=False))
+                    buf.write("\n")
+                else:
+                    if include_files:
+                        d["files"] = json.dumps(d["files"], default=str, ensure_ascii=False)
+                    writer.writerow([d[c] for c in columns])
+            yield buf.getvalue().encode()
+
+def inbox_query(department_id: int, status: Optional[str], order: str, cursor: Optional[str], limit: int):
+    """Inbox page query; served by ix_complaints_dept_status_created / ix_complaints_dept_created."""
+    stmt = select(*_COLUMNS).where(complaints.c.department_id == department_id)
+    if status is not None:
+        stmt = stmt.where(complaints.c.status == status)
+    if order == "oldest":
+        if cursor:
+            stmt = stmt.where(keyset_after(complaints.c.created_at, complaints.c.complaint_id, cursor))
+        stmt = stmt.order_by(complaints.c.created_at.asc(), complaints.c.complaint_id.asc())
+    else:
+        if cursor:
+            stmt = stmt.where(keyset_before(complaints.c.created_at, complaints.c.complaint_id, cursor))
+        stmt = stmt.order_by(complaints.c.created_at.desc(), complaints.c.complaint_id.desc())
+    return stmt.limit(limit + 1)
+
+async def _load_files(db: AsyncSession, complaint_ids: list[int]) -> dict[int, list]:
+    """Load files for many complaints with a single IN (...) query, grouped by complaint_id."""
+    grouped: dict[int, list] = {cid: [] for cid in complaint_ids}
+    if not complaint_ids:
+        return grouped
+    result = await db.execute(
+        select(files_table)
+        .where(files_table.c.complaint_id.in_(complaint_ids))
+        .order_by(files_table.c.uploaded_at.desc())
     )
-    d = dict(row)
-    d["files"] = fs
-    return d
+    for f in result.mappings().all():
+        grouped[f["complaint_id"]].append(f)
+    return grouped
+
+async def _with_files(db: AsyncSession, rows: list) -> list[dict]:
+    """Attach file lists to a page of complaint rows."""
+    grouped = await _load_files(db, [r["complaint_id"] for r in rows])
+    out = []
+    for r in rows:
+        d = dict(r)
+        d["files"] = grouped[r["complaint_id"]]
+        out.append(d)
+    return out
 
-def _get(db: Session, complaint_id: int, user_id: int) -> dict:
+async def _get(db: AsyncSession, complaint_id: int, user_id: int) -> dict:
     """Fetch a single complaint by id for the given user and attach files."""
-    r = (
-        db.execute(select(complaints).where(complaints.c.complaint_id == complaint_id))
-        .mappings()
-        .first()
-    )
+    result = await db.execute(select(*_COLUMNS).where(complaints.c.complaint_id == complaint_id))
+    r = result.mappings().first()
     if not r or r["user_id"] != user_id:
         raise HTTPException(404, "Complaint not found")
-    return _with_files(db, r)
+    return (await _with_files(db, [r]))[0]
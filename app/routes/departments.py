@@ -1,39 +1,36 @@
 # app/routes/departments.py
 from typing import Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db, departments
+from app.db import get_db
 from app.auth import get_current_user
+from app.utils.reference_cache import reference_cache, cached_json
 
 router = APIRouter()
 
 @router.get("", summary="List departments", tags=["Department"])
-def list_departments(
+async def list_departments(
+    request: Request,
     category_id: Optional[int] = Query(None, description="Filter by category_id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: Dict = Depends(get_current_user),
 ):
-    stmt = select(departments)
+    snap = await reference_cache.get(db)
+    rows = snap.departments
     if category_id is not None:
-        stmt = stmt.where(departments.c.category_id == category_id)
-    rows = db.execute(stmt.order_by(departments.c.department_id)).mappings().all()
-    return rows
+        rows = [d for d in rows if d["category_id"] == category_id]
+    return cached_json(request, rows)
 
 @router.get("/{department_id}", summary="Get a department by id", tags=["Department"])
-def get_department(
+async def get_department(
+    request: Request,
     department_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: Dict = Depends(get_current_user),
 ):
-    row = (
-        db.execute(
-            select(departments).where(departments.c.department_id == department_id)
-        )
-        .mappings()
-        .first()
-    )
+    snap = await reference_cache.get(db)
+    row = snap.department_by_id.get(department_id)
     if not row:
         raise HTTPException(404, "Department not found")
-    return row
+    return cached_json(request, row)
@@ -1,40 +1,95 @@
 # app/routes/files.py
-import os
+import io
+import re
 import uuid
+import hashlib
+import asyncio
+from contextlib import suppress
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.responses import StreamingResponse, RedirectResponse, Response
+from pydantic import BaseModel
 from starlette.background import BackgroundTask
-from sqlalchemy import select, insert, update, func
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.deleteobjects import DeleteObject
 
-from app.db import get_db, complaints, files as files_table
+from app.db import get_db, complaints, files as files_table, object_tombstones
 from app.auth import get_current_user
+from app.config import settings
+from app.utils.upload_stream import iter_multipart, StreamingPart, UploadTooLarge
+from app.utils.bulk_insert import insert_many
+from app.utils.thumbnails import thumbnail_pipeline
 
 # ---- MinIO setup ---------------------------------------------------------
-endpoint = os.getenv("MINIO_ENDPOINT")
-access   = os.getenv("MINIO_ACCESS_KEY")
-secret   = os.getenv("MINIO_SECRET_KEY")
-if not endpoint or not access or not secret:
-    raise RuntimeError("MINIO_* environment variables are required.")
-
-MINIO_BUCKET = os.getenv("MINIO_BUCKET", "minwon")
+# Client construction makes no network calls; the bucket is checked in the app lifespan
+MINIO_BUCKET = settings.MINIO_BUCKET
+# Hashed uploads live under blobs/<sha256>; only presigned uploads keep per-complaint keys
+BLOB_PREFIX = "blobs/"
 _minio = Minio(
-    endpoint,
-    access_key=access,
-    secret_key=secret,
-    secure=os.getenv("MINIO_SECURE", "false").lower() == "true",
+    settings.MINIO_ENDPOINT,
+    access_key=settings.MINIO_ACCESS_KEY,
+    secret_key=settings.MINIO_SECRET_KEY,
+    secure=settings.MINIO_SECURE,
 )
 
-# Ensure bucket exists
-if not _minio.bucket_exists(MINIO_BUCKET):
-    _minio.make_bucket(MINIO_BUCKET)
+def ensure_bucket() -> None:
+    """Create the bucket if missing (blocking; called once at startup)."""
+    if not _minio.bucket_exists(MINIO_BUCKET):
+        _minio.make_bucket(MINIO_BUCKET)
 
 router = APIRouter()
 
+def read_object(bucket: str, object_key: str) -> bytes:
+    """Whole object body (blocking); used by background jobs, not request paths."""
+    resp = _minio.get_object(bucket, object_key)
+    try:
+        return resp.read()
+    finally:
+        _cleanup_minio_response(resp)
+
+def write_object(bucket: str, object_key: str, data: bytes, content_type: str) -> None:
+    """Put a small in-memory object (blocking); used by background jobs."""
+    _minio.put_object(bucket, object_key, io.BytesIO(data), len(data), content_type=content_type)
+
+def delete_objects(bucket: str, object_keys: List[str]) -> dict[str, str]:
+    """S3 multi-object delete (blocking, up to 1000 keys per request); returns {key: error} for failures."""
+    errors = _minio.remove_objects(bucket, [DeleteObject(key) for key in object_keys])
+    return {e.name: f"{e.code}: {e.message}" for e in errors}
+
+def blob_key(digest: str) -> str:
+    """Content-addressed object key, shared by every file with this SHA-256."""
+    return f"{BLOB_PREFIX}{digest}"
+
+def copy_to_blob(src_key: str, digest: str) -> None:
+    """Server-side copy of an object to its content-addressed key (blocking)."""
+    _minio.copy_object(MINIO_BUCKET, blob_key(digest), CopySource(MINIO_BUCKET, src_key))
+
+def list_objects(bucket: str, prefix: str, start_after: str | None = None) -> Iterator[tuple[str, datetime | None]]:
+    """(key, last_modified) of every object under `prefix`, in key order (blocking, paged lazily)."""
+    for obj in _minio.list_objects(bucket, prefix=prefix, recursive=True, start_after=start_after):
+        yield obj.object_name, obj.last_modified
+
+# ---- Request Schemas -----------------------------------------------------
+class PresignUploadRequest(BaseModel):
+    complaint_id: int
+    filename: str
+    content_type: Optional[str] = None
+
+class ConfirmUploadRequest(BaseModel):
+    complaint_id: int
+    object_key: str
+    original_filename: str
+    content_type: Optional[str] = None
+
 # ---- Helpers -------------------------------------------------------------
 def _guess_type(ct: str | None) -> str:
     ct = (ct or "").lower()
@@ -51,6 +106,185 @@ def _file_length(upload: UploadFile) -> int:
     f.seek(0)
     return size
 
+def _file_sha256(upload: UploadFile) -> str:
+    """SHA-256 of a spooled upload (blocking); leaves the file rewound."""
+    f = upload.file
+    f.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+def _put_upload(object_key: str, up: UploadFile) -> None:
+    """Blocking MinIO put for one upload (run in the threadpool)."""
+    length = _file_length(up)
+    _minio.put_object(
+        bucket_name=MINIO_BUCKET,
+        object_name=object_key,
+        data=up.file,
+        length=length,
+        content_type=up.content_type or "application/octet-stream",
+    )
+
+def _put_stream(object_key: str, part: StreamingPart, content_type: str | None) -> None:
+    """Blocking MinIO multipart upload of unknown length, fed by a StreamingPart."""
+    try:
+        _minio.put_object(
+            bucket_name=MINIO_BUCKET,
+            object_name=object_key,
+            data=part,
+            length=-1,
+            part_size=settings.UPLOAD_PART_SIZE,
+            content_type=content_type or "application/octet-stream",
+        )
+    finally:
+        part.reader_done()
+
+def _remove_objects(object_keys: List[str]) -> None:
+    """Best-effort removal of objects private to a failed request (never shared blobs)."""
+    for key in object_keys:
+        try:
+            _minio.remove_object(MINIO_BUCKET, key)
+        except Exception as e:
+            print(f"[WARN] Failed to remove orphaned object {key}: {e}")
+
+async def _put_all(db: AsyncSession, uploads: List[tuple[str, UploadFile]]) -> None:
+    """Upload concurrently (bounded); on any failure discard what succeeded and raise."""
+    sem = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+
+    async def put_one(object_key: str, up: UploadFile) -> None:
+        async with sem:
+            await run_in_threadpool(_put_upload, object_key, up)
+
+    results = await asyncio.gather(
+        *(put_one(key, up) for key, up in uploads), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        done = [key for (key, _), r in zip(uploads, results) if not isinstance(r, BaseException)]
+        await _discard_blobs(db, done)
+        print(f"[ERROR] Upload failed: {errors[0]}")
+        raise HTTPException(502, "File upload failed")
+
+async def _get_owned_complaint(db: AsyncSession, complaint_id: int, user_id: int) -> dict:
+    result = await db.execute(select(complaints).where(complaints.c.complaint_id == complaint_id))
+    comp = result.mappings().first()
+    if not comp or comp["user_id"] != user_id:
+        raise HTTPException(404, "Complaint not found")
+    return comp
+
+async def _claim_blobs(db: AsyncSession, digests: set[str]) -> set[str]:
+    """Digests whose blob a files row already references; the caller puts the rest.
+
+    A blob whose last row was deleted may still have a tombstone queued. It is
+    dropped before the blob is put again, so the reaper cannot remove the new
+    copy before the row referencing it commits (a reaper already holding the
+    tombstone finishes first). Commits, so no connection is held afterwards.
+    """
+    if not digests:
+        return set()
+    keys = {blob_key(d): d for d in digests}
+    try:
+        result = await db.execute(
+            select(files_table.c.minio_object_key)
+            .where(files_table.c.minio_bucket == MINIO_BUCKET, files_table.c.minio_object_key.in_(keys))
+            .distinct()
+        )
+        stored = {keys[k] for k in result.scalars().all()}
+        await db.execute(
+            delete(object_tombstones).where(
+                object_tombstones.c.minio_bucket == MINIO_BUCKET,
+                object_tombstones.c.minio_object_key.in_([blob_key(d) for d in digests - stored]),
+            )
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return stored
+
+async def _discard_blobs(db: AsyncSession, object_keys: List[str]) -> None:
+    """Queue blobs put by a failed request for the reaper instead of removing them.
+
+    A concurrent request may reference the same content by now; the reaper
+    re-checks references after the grace period. If even that fails, the
+    objects are left for `database.reconcile_objects`.
+    """
+    if not object_keys:
+        return
+    try:
+        await db.execute(
+            insert(object_tombstones),
+            [{"minio_bucket": MINIO_BUCKET, "minio_object_key": k} for k in object_keys],
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"[WARN] Could not queue {len(object_keys)} blob(s) for removal: {e}")
+
+async def _record_files(db: AsyncSession, comp: dict, rows: List[dict], uploaded: List[str]) -> List[dict]:
+    """Insert uploaded file rows and update submission_type.
+
+    On failure the blobs this request put (`uploaded`) are queued for the
+    reaper; blobs that rows merely reference are left alone.
+    """
+    try:
+        file_ids = await insert_many(db, files_table, rows)
+
+        # Update submission_type based on presence of text
+        new_type = "TEXT_IMAGE" if comp["original_text"] else "IMAGE"
+        await db.execute(
+            update(complaints)
+            .where(complaints.c.complaint_id == comp["complaint_id"])
+            .values(submission_type=new_type, updated_at=func.now())
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        await _discard_blobs(db, uploaded)
+        raise
+
+    return [{"file_id": file_id, **row} for file_id, row in zip(file_ids, rows)]
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=` range into inclusive (start, end); None = serve whole object.
+
+    Malformed or multi-part ranges (e.g. `bytes=5-3`) are ignored, per RFC 9110;
+    only a well-formed range that lies past the end of the object gets 416.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    m = re.fullmatch(r"\s*(\d*)-(\d*)\s*", spec)
+    if m is None or not any(m.groups()):
+        return None
+    first, last = m.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: last N bytes; a zero-length suffix selects nothing
+        start, end = max(size - int(last), 0), size - 1 if int(last) else -1
+    if start > end:
+        raise HTTPException(416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def _not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        tags = [t.strip().removeprefix("W/") for t in inm.split(",")]
+        return etag in tags or "*" in tags
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+    return False
+
 def _cleanup_minio_response(resp):
     try:
         resp.close()
@@ -62,127 +296,310 @@ def _cleanup_minio_response(resp):
 
 # ---- Routes --------------------------------------------------------------
 @router.post("/upload", summary="Upload files and attach to a complaint")
-def upload_files(
+async def upload_files(
+    background_tasks: BackgroundTasks,
     complaint_id: int = Form(...),
     file_list: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: Dict = Depends(get_current_user),
 ):
     # Verify complaint ownership
-    comp = (
-        db.execute(select(complaints).where(complaints.c.complaint_id == complaint_id))
-        .mappings()
-        .first()
-    )
-    if not comp or comp["user_id"] != user["user_id"]:
-        raise HTTPException(404, "Complaint not found")
+    comp = await _get_owned_complaint(db, complaint_id, user["user_id"])
 
-    outputs = []
-    for up in file_list:
+    # Content already stored (here or in another complaint) is referenced, not uploaded again
+    digests = [await run_in_threadpool(_file_sha256, up) for up in file_list]
+    known = await _claim_blobs(db, set(digests))
+
+    uploaded_at = datetime.now().replace(microsecond=0)
+    rows, uploads = [], []
+    for up, digest in zip(file_list, digests):
         ext = Path(up.filename or "").suffix
         stored = f"{uuid.uuid4().hex}{ext}"
-        object_key = f"complaints/{complaint_id}/{stored}"
+        if digest not in known:
+            known.add(digest)
+            uploads.append((blob_key(digest), up))
+        rows.append({
+            "complaint_id": complaint_id,
+            "original_filename": up.filename or stored,
+            "stored_filename": stored,
+            "file_type": _guess_type(up.content_type),
+            "minio_bucket": MINIO_BUCKET,
+            "minio_object_key": blob_key(digest),
+            "content_sha256": digest,
+            "uploaded_at": uploaded_at,
+        })
 
-        length = _file_length(up)
-        _minio.put_object(
-            bucket_name=MINIO_BUCKET,
-            object_name=object_key,
-            data=up.file,
-            length=length,
-            content_type=up.content_type or "application/octet-stream",
-        )
+    await _put_all(db, uploads)
+    outputs = await _record_files(db, comp, rows, uploaded=[key for key, _ in uploads])
+    background_tasks.add_task(thumbnail_pipeline.generate_quietly, outputs)
+    return outputs
 
-        res = db.execute(
-            insert(files_table).values(
-                complaint_id=complaint_id,
-                original_filename=up.filename or stored,
-                stored_filename=stored,
-                file_type=_guess_type(up.content_type),
-                minio_bucket=MINIO_BUCKET,
-                minio_object_key=object_key,
-                uploaded_at=func.now(),
-            )
-        )
-        file_id = res.inserted_primary_key[0]
-        meta = (
-            db.execute(select(files_table).where(files_table.c.file_id == file_id))
-            .mappings()
-            .first()
-        )
-        outputs.append(meta)
-
-    # Update submission_type based on presence of text
-    new_type = "TEXT_IMAGE" if comp["original_text"] else "IMAGE"
-    db.execute(
-        update(complaints)
-        .where(complaints.c.complaint_id == complaint_id)
-        .values(submission_type=new_type, updated_at=func.now())
+@router.post("/upload-stream", summary="Stream files straight to MinIO and attach to a complaint")
+async def upload_files_stream(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    complaint_id: int = Query(...),
+    db: AsyncSession = Depends(get_db),
+    user: Dict = Depends(get_current_user),
+):
+    """Multipart body is piped part by part into MinIO multipart uploads.
+
+    Nothing is spooled to disk; each file is hashed (SHA-256) and size-checked
+    while streaming, and an oversized file is rejected with 413 as soon as it
+    crosses MAX_UPLOAD_SIZE. The digest is only known once a file has been
+    streamed, so each file is staged under the complaint's prefix and then
+    copied server-side to its blob (or dropped if the blob is already stored).
+    """
+    # Verify complaint ownership before reading the body
+    comp = await _get_owned_complaint(db, complaint_id, user["user_id"])
+    # End the read transaction so no pooled connection is held while the body streams
+    await db.rollback()
+
+    uploaded_at = datetime.now().replace(microsecond=0)
+    rows, digests, uploaded = [], [], []
+    known: set[str] = set()
+    part = task = staged = None
+    try:
+        async for event in iter_multipart(request):
+            if event[0] == "begin":
+                _, _, filename, content_type = event
+                if filename is None:
+                    continue
+                ext = Path(filename).suffix
+                stored = f"{uuid.uuid4().hex}{ext}"
+                staged = f"complaints/{complaint_id}/{stored}"
+                part = StreamingPart(settings.MAX_UPLOAD_SIZE)
+                task = asyncio.ensure_future(run_in_threadpool(_put_stream, staged, part, content_type))
+                row = {
+                    "complaint_id": complaint_id,
+                    "original_filename": filename or stored,
+                    "stored_filename": stored,
+                    "file_type": _guess_type(content_type),
+                    "minio_bucket": MINIO_BUCKET,
+                    "uploaded_at": uploaded_at,
+                }
+            elif event[0] == "data" and part is not None:
+                try:
+                    await part.feed(event[1])
+                except anyio.BrokenResourceError:
+                    # Reader stopped early: surface the MinIO error
+                    await task
+                    raise RuntimeError("MinIO upload stopped before end of file")
+            elif event[0] == "end" and part is not None:
+                await part.close()
+                await task
+                digest = part.sha256.hexdigest()
+                if digest not in known:
+                    known |= await _claim_blobs(db, {digest})
+                if digest not in known:
+                    await run_in_threadpool(copy_to_blob, staged, digest)
+                    uploaded.append(blob_key(digest))
+                    known.add(digest)
+                await run_in_threadpool(_remove_objects, [staged])
+                rows.append({**row, "minio_object_key": blob_key(digest), "content_sha256": digest})
+                digests.append({"size": part.size, "sha256": digest})
+                part = task = staged = None
+    except Exception as e:
+        if part is not None:
+            await part.abort()
+            with suppress(Exception):
+                await task
+        if staged is not None:
+            await run_in_threadpool(_remove_objects, [staged])
+        await _discard_blobs(db, uploaded)
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(413, str(e))
+        if isinstance(e, HTTPException):
+            raise
+        print(f"[ERROR] Streaming upload failed: {e}")
+        raise HTTPException(502, "File upload failed")
+
+    if not rows:
+        raise HTTPException(400, "No files uploaded")
+
+    outputs = await _record_files(db, comp, rows, uploaded)
+    background_tasks.add_task(thumbnail_pipeline.generate_quietly, outputs)
+    return [{**out, **digest} for out, digest in zip(outputs, digests)]
+
+@router.post("/presign-upload", summary="Issue a presigned PUT URL for direct upload to MinIO")
+async def presign_upload(
+    payload: PresignUploadRequest,
+    db: AsyncSession = Depends(get_db),
+    user: Dict = Depends(get_current_user),
+):
+    await _get_owned_complaint(db, payload.complaint_id, user["user_id"])
+
+    ext = Path(payload.filename).suffix
+    stored = f"{uuid.uuid4().hex}{ext}"
+    object_key = f"complaints/{payload.complaint_id}/{stored}"
+    expires = timedelta(seconds=settings.PRESIGNED_URL_EXPIRES)
+    url = await run_in_threadpool(_minio.presigned_put_object, MINIO_BUCKET, object_key, expires)
+    return {
+        "upload_url": url,
+        "object_key": object_key,
+        "expires_in": settings.PRESIGNED_URL_EXPIRES,
+    }
+
+@router.post("/confirm-upload", summary="Record a file uploaded through a presigned URL")
+async def confirm_upload(
+    payload: ConfirmUploadRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: Dict = Depends(get_current_user),
+):
+    """Presigned uploads are not deduplicated: the row keeps its per-complaint key
+    and content_sha256 stays NULL.
+
+    Hashing would mean pulling the object back through the API tier, which is
+    what presigning avoids, and a digest claimed by the client cannot be
+    trusted to name a shared blob. `database.migrate_file_dedup --move-existing`
+    folds them into blobs offline.
+    """
+    comp = await _get_owned_complaint(db, payload.complaint_id, user["user_id"])
+
+    # Only keys issued for this complaint, and only once
+    prefix = f"complaints/{payload.complaint_id}/"
+    stored = payload.object_key[len(prefix):]
+    if not payload.object_key.startswith(prefix) or not stored or "/" in stored:
+        raise HTTPException(400, "Invalid object_key")
+    exists = await db.scalar(
+        select(files_table.c.file_id).where(files_table.c.minio_object_key == payload.object_key)
     )
+    if exists:
+        raise HTTPException(409, "File already recorded")
 
-    db.commit()
-    return outputs
+    try:
+        stat = await run_in_threadpool(_minio.stat_object, MINIO_BUCKET, payload.object_key)
+    except Exception:
+        raise HTTPException(400, "Object has not been uploaded")
+    if stat.size > settings.MAX_UPLOAD_SIZE:
+        await run_in_threadpool(_remove_objects, [payload.object_key])
+        raise HTTPException(413, f"File exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+
+    content_type = payload.content_type or stat.content_type
+    row = {
+        "complaint_id": payload.complaint_id,
+        "original_filename": payload.original_filename or stored,
+        "stored_filename": stored,
+        "file_type": _guess_type(content_type),
+        "minio_bucket": MINIO_BUCKET,
+        "minio_object_key": payload.object_key,
+        "uploaded_at": datetime.now().replace(microsecond=0),
+    }
+    outputs = await _record_files(db, comp, [row], uploaded=[])
+    background_tasks.add_task(thumbnail_pipeline.generate_quietly, outputs)
+    return outputs[0]
 
 @router.get("/{file_id}", summary="Get file metadata")
-def get_file_meta(
+async def get_file_meta(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: Dict = Depends(get_current_user),
 ):
-    f = (
-        db.execute(select(files_table).where(files_table.c.file_id == file_id))
-        .mappings()
-        .first()
-    )
+    result = await db.execute(select(files_table).where(files_table.c.file_id == file_id))
+    f = result.mappings().first()
     if not f:
         raise HTTPException(404, "File not found")
 
-    comp = (
-        db.execute(select(complaints).where(complaints.c.complaint_id == f["complaint_id"]))
-        .mappings()
-        .first()
-    )
+    result = await db.execute(select(complaints).where(complaints.c.complaint_id == f["complaint_id"]))
+    comp = result.mappings().first()
     if not comp or comp["user_id"] != user["user_id"]:
         raise HTTPException(404, "File not found")
 
     return f
 
 @router.get("/{file_id}/download", summary="Download a file from MinIO")
-def download_file(
+async def download_file(
+    request: Request,
     file_id: int,
-    db: Session = Depends(get_db),
+    mode: Optional[str] = Query(None, description="proxy | redirect | url (default: FILE_DOWNLOAD_MODE)"),
+    size: Optional[str] = Query(None, description="Image variant, e.g. thumb | preview (falls back to the original)"),
+    db: AsyncSession = Depends(get_db),
     user: Dict = Depends(get_current_user),
 ):
-    f = (
-        db.execute(select(files_table).where(files_table.c.file_id == file_id))
-        .mappings()
-        .first()
-    )
+    result = await db.execute(select(files_table).where(files_table.c.file_id == file_id))
+    f = result.mappings().first()
     if not f:
         raise HTTPException(404, "File not found")
 
-    comp = (
-        db.execute(select(complaints).where(complaints.c.complaint_id == f["complaint_id"]))
-        .mappings()
-        .first()
-    )
+    result = await db.execute(select(complaints).where(complaints.c.complaint_id == f["complaint_id"]))
+    comp = result.mappings().first()
     if not comp or comp["user_id"] != user["user_id"]:
         raise HTTPException(404, "File not found")
 
-    # Stream from MinIO; ensure the response is closed after sending
-    resp = _minio.get_object(f["minio_bucket"], f["minio_object_key"])
+    filename = f["original_filename"] or f["stored_filename"]
+    object_key, media = f["minio_object_key"], None
+    if size is not None:
+        if size not in settings.THUMBNAIL_SIZES:
+            raise HTTPException(400, "Invalid size")
+        # Variants are generated after upload; until then serve the original
+        variant = (f["variants"] or {}).get(size)
+        if variant:
+            object_key, media = variant["key"], variant["content_type"]
+            filename = f"{Path(filename).stem}.{size}{Path(object_key).suffix}"
 
-    media = "application/octet-stream"
-    if f["file_type"] == "IMAGE":
-        media = "image/*"
-    elif f["file_type"] == "PDF":
-        media = "application/pdf"
+    mode = mode or settings.FILE_DOWNLOAD_MODE
+    if mode in ("redirect", "url"):
+        # Hand the transfer to MinIO with a short-lived presigned GET
+        url = await run_in_threadpool(
+            _minio.presigned_get_object,
+            f["minio_bucket"],
+            object_key,
+            expires=timedelta(seconds=settings.PRESIGNED_URL_EXPIRES),
+            response_headers={"response-content-disposition": f'attachment; filename="{filename}"'},
+        )
+        if mode == "redirect":
+            return RedirectResponse(url, status_code=307)
+        return {"url": url, "expires_in": settings.PRESIGNED_URL_EXPIRES}
+    if mode != "proxy":
+        raise HTTPException(400, "Invalid mode")
 
+    stat = await run_in_threadpool(_minio.stat_object, f["minio_bucket"], object_key)
+    etag = f'"{stat.etag}"'
     headers = {
-        "Content-Disposition": f'attachment; filename="{f["original_filename"] or f["stored_filename"]}"'
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
     }
+    if stat.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(stat.last_modified, usegmt=True)
+
+    if _not_modified(request, etag, stat.last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if media is None:
+        media = "application/octet-stream"
+        if f["file_type"] == "IMAGE":
+            media = "image/*"
+        elif f["file_type"] == "PDF":
+            media = "application/pdf"
+
+    # Honour Range unless If-Range names a different version
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, stat.size)
+
+    # Stream from MinIO; ensure the response is closed after sending
+    if byte_range is None:
+        status_code = 200
+        resp = await run_in_threadpool(_minio.get_object, f["minio_bucket"], object_key)
+        headers["Content-Length"] = str(stat.size)
+    else:
+        start, end = byte_range
+        status_code = 206
+        resp = await run_in_threadpool(
+            _minio.get_object, f["minio_bucket"], object_key,
+            offset=start, length=end - start + 1,
+        )
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+        headers["Content-Length"] = str(end - start + 1)
 
     return StreamingResponse(
         resp.stream(32 * 1024),
+        status_code=status_code,
         media_type=media,
         headers=headers,
         background=BackgroundTask(_cleanup_minio_response, resp),
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Text, DateTime
+from database.mariadb_connection import MariaDBBase
+
+
+class SingleFlightResult(MariaDBBase):
+    """The latest result of a single-flight call, shared by every worker
+    (app.utils.single_flight.MariaDBLockBackend). Written under the call's
+    named lock, so a worker that waited on the lock re-reads it instead of
+    repeating the call (e.g. a Keycloak token refresh)."""
+
+    __tablename__ = "single_flight_results"
+
+    # The GET_LOCK name the call ran under
+    name = Column(String(64), primary_key=True)
+    # Serialized (for token refreshes: encrypted) result
+    value = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<SingleFlightResult(name='{self.name}')>"
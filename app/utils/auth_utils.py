@@ -1,24 +1,167 @@
 # app/utils/auth_utils.py
-import httpx
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
 from jwt import decode, get_unverified_header
 from jwt import algorithms
 from fastapi import HTTPException
 from app.config import settings
+from app.utils.keycloak_http import keycloak_http
 
 
-def decode_access_token(token: str) -> dict:
-    try:
-        jwks_url = f"{settings.ISSUER_BASE_URL}/protocol/openid-connect/certs"
+class JWKSKeyStore:
+    """Process-wide cache of Keycloak signing keys, keyed by `kid`.
+
+    Keys are refetched when the TTL elapses, or early when a token carries an
+    unknown `kid` (at most once per `min_refresh_interval`). If Keycloak cannot
+    be reached, the last good key set keeps being served. Concurrent callers
+    join one fetch task instead of each fetching; nothing is held across the
+    network call, so lookups of known keys never wait on Keycloak.
+    """
+
+    def __init__(self, jwks_url: str, ttl: float, min_refresh_interval: float):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.clear()
+
+    async def _fetch(self) -> dict:
+        resp = await keycloak_http.client.get(self.jwks_url)
+        resp.raise_for_status()
+        jwks = resp.json()
+
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("kty") != "RSA" or "kid" not in jwk:
+                continue
+            keys[jwk["kid"]] = algorithms.RSAAlgorithm.from_jwk(jwk)
+        return keys
+
+    async def _refresh(self, now: float) -> None:
+        try:
+            keys = await self._fetch()
+        except Exception as e:
+            if not self._keys:
+                raise
+            # Keep serving the last good key set; retry after the rate-limit window
+            self._fetched_at = now - self.ttl + self.min_refresh_interval
+            print(f"[WARN] JWKS refresh failed, serving cached keys: {e}")
+        else:
+            self._keys = keys
+            self._fetched_at = now
+            print(f"[DEBUG] 🔑 JWKS refreshed ({len(self._keys)} keys)")
+        finally:
+            self._refreshing = None
+
+    async def _join_refresh(self) -> None:
+        # No await between the check and the assignment, so only one fetch starts
+        if self._refreshing is None:
+            now = time.monotonic()
+            self._last_attempt = now
+            self._refreshing = asyncio.ensure_future(self._refresh(now))
+        await asyncio.shield(self._refreshing)
+
+    async def get_key(self, kid: str):
+        if time.monotonic() - self._fetched_at >= self.ttl:
+            await self._join_refresh()
+
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_attempt >= self.min_refresh_interval:
+            # Unknown kid: Keycloak may have rotated keys
+            await self._join_refresh()
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise KeyError(f"Unknown signing key: {kid}")
+        return key
+
+    def clear(self) -> None:
+        # -inf: never fetched, so the first lookup always counts as stale
+        self._keys = {}
+        self._fetched_at = float("-inf")
+        self._last_attempt = float("-inf")
+        self._refreshing: asyncio.Task | None = None
+
+
+jwks_store = JWKSKeyStore(
+    jwks_url=f"{settings.ISSUER_BASE_URL}/protocol/openid-connect/certs",
+    ttl=settings.JWKS_CACHE_TTL,
+    min_refresh_interval=settings.JWKS_MIN_REFRESH_INTERVAL,
+)
+
 
+class VerifiedTokenCache:
+    """Bounded LRU of verified token digests -> decoded claims.
+
+    Entries expire at the token's `exp`, so a hit never outlives the token.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                exp, payload = entry
+                if exp > time.time():
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return payload
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if self.maxsize <= 0 or not isinstance(exp, (int, float)):
+            return
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (exp, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_cache = VerifiedTokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+
+async def decode_access_token(token: str) -> dict:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    try:
         headers = get_unverified_header(token)
         kid = headers["kid"]
 
-        with httpx.Client(verify=False) as client:
-            jwks_response = client.get(jwks_url)
-            jwks = jwks_response.json()
-
-        key = next(k for k in jwks["keys"] if k["kid"] == kid)
-        public_key = algorithms.RSAAlgorithm.from_jwk(key)
+        public_key = await jwks_store.get_key(kid)
 
         payload = decode(
             token,
@@ -26,6 +169,7 @@ def decode_access_token(token: str) -> dict:
             algorithms=["RS256"],
             options={"verify_aud": False},
         )
+        token_cache.put(token, payload)
         return payload
 
     except Exception as e:
@@ -0,0 +1,33 @@
+# app/utils/bulk_insert.py
+from typing import List
+
+from sqlalchemy import Table, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def insert_many(db: AsyncSession, table: Table, rows: List[dict]) -> List[int]:
+    """Insert all rows and return their primary keys in order.
+
+    One executemany with RETURNING where the database has it; otherwise a
+    statement per row, since ids cannot be derived from a multi-row INSERT.
+    """
+    pk = table.primary_key.columns.values()[0]
+    if not rows:
+        return []
+
+    dialect = db.bind.dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        # MariaDB >= 10.5 (and SQLite/PostgreSQL): executemany with RETURNING,
+        # ids matched to rows by SQLAlchemy even when it batches the VALUES
+        res = await db.execute(insert(table).returning(pk, sort_by_parameter_order=True), rows)
+        return list(res.scalars().all())
+
+    # No RETURNING: one INSERT per row. A multi-row INSERT only reports its
+    # first id, and the rest are not consecutive under
+    # innodb_autoinc_lock_mode=2 or Galera's auto_increment_increment.
+    stmt = insert(table)
+    ids = []
+    for row in rows:
+        res = await db.execute(stmt, row)
+        ids.append(res.inserted_primary_key[0])
+    return ids
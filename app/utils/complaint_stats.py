@@ -0,0 +1,74 @@
+# app/utils/complaint_stats.py
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import Connection, delete, func, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import complaints, complaint_stats
+
+# Bucket key: (day, status, category_id, department_id); day None = today on the DB clock
+StatKey = tuple
+
+
+def stat_key(row: dict, today: bool = False) -> StatKey:
+    created = row.get("created_at")
+    day = None if today or created is None else (created.date() if isinstance(created, datetime) else created)
+    return day, str(row["status"]), row.get("category_id") or 0, row.get("department_id") or 0
+
+
+def stat_deltas(old: dict | None = None, new: dict | None = None) -> Counter:
+    """Bucket deltas for one complaint going from `old` to `new` (None = absent)."""
+    deltas: Counter = Counter()
+    if old is not None:
+        deltas[stat_key(old)] -= 1
+    if new is not None:
+        deltas[stat_key(new)] += 1
+    return deltas
+
+
+def _upsert(dialect: str, values: dict, delta: int):
+    bump = {"count": complaint_stats.c.count + delta}
+    if dialect in ("mysql", "mariadb"):
+        return mysql.insert(complaint_stats).values(**values).on_duplicate_key_update(**bump)
+    ins = (postgresql if dialect == "postgresql" else sqlite).insert(complaint_stats).values(**values)
+    return ins.on_conflict_do_update(index_elements=list(complaint_stats.primary_key.columns), set_=bump)
+
+
+async def apply_stat_deltas(db: AsyncSession, deltas: Counter) -> None:
+    """Add `deltas` to the summary table in the caller's transaction (one upsert per bucket)."""
+    dialect = db.bind.dialect.name
+    for (day, status, category_id, department_id), delta in deltas.items():
+        if not delta:
+            continue
+        values = {
+            "day": func.current_date() if day is None else day,
+            "status": status,
+            "category_id": category_id,
+            "department_id": department_id,
+            "count": delta,
+        }
+        await db.execute(_upsert(dialect, values, delta))
+
+
+def rebuild_complaint_stats(conn: Connection) -> int:
+    """Recompute the whole summary table from `complaints`; returns the bucket count.
+
+    Runs as DELETE + INSERT ... SELECT in the caller's transaction, so readers
+    never see a half-built table.
+    """
+    day = func.date(complaints.c.created_at)
+    category_id = func.coalesce(complaints.c.category_id, 0)
+    department_id = func.coalesce(complaints.c.department_id, 0)
+    source = (
+        select(day, complaints.c.status, category_id, department_id, func.count())
+        .group_by(day, complaints.c.status, category_id, department_id)
+    )
+    conn.execute(delete(complaint_stats))
+    conn.execute(
+        insert(complaint_stats).from_select(
+            ["day", "status", "category_id", "department_id", "count"], source
+        )
+    )
+    return conn.execute(select(func.count()).select_from(complaint_stats)).scalar()
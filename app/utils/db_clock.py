@@ -0,0 +1,41 @@
+# app/utils/db_clock.py
+from sqlalchemy import literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import DateTime
+
+
+class seconds_ago(FunctionElement):
+    """The database's NOW() minus `seconds`.
+
+    Cutoffs against timestamps written with func.now() must use the same
+    clock; the app server's time zone may differ from the database's.
+    """
+
+    type = DateTime()
+    name = "seconds_ago"
+    inherit_cache = True
+
+    def __init__(self, seconds: int):
+        super().__init__(literal(int(seconds)))
+
+
+def seconds_from_now(seconds: int) -> seconds_ago:
+    """The database's NOW() plus `seconds` (e.g. an expiry)."""
+    return seconds_ago(-seconds)
+
+
+@compiles(seconds_ago)
+def _seconds_ago_default(element, compiler, **kw):
+    return f"(NOW() - INTERVAL {compiler.process(element.clauses, **kw)} SECOND)"
+
+
+@compiles(seconds_ago, "postgresql")
+def _seconds_ago_postgresql(element, compiler, **kw):
+    return f"(NOW() - make_interval(secs => {compiler.process(element.clauses, **kw)}))"
+
+
+@compiles(seconds_ago, "sqlite")
+def _seconds_ago_sqlite(element, compiler, **kw):
+    # Same UTC text format as CURRENT_TIMESTAMP (what func.now() renders on SQLite)
+    return f"datetime('now', (-{compiler.process(element.clauses, **kw)}) || ' seconds')"
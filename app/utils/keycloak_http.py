@@ -0,0 +1,135 @@
+# app/utils/keycloak_http.py
+import time
+import threading
+
+import httpx
+
+from app.config import settings
+
+
+# Path suffix -> endpoint name used in the latency counters
+_ENDPOINTS = (
+    ("/.well-known/openid-configuration", "metadata"),
+    ("/protocol/openid-connect/token", "token"),
+    ("/protocol/openid-connect/certs", "jwks"),
+    ("/protocol/openid-connect/userinfo", "userinfo"),
+    ("/protocol/openid-connect/logout", "logout"),
+)
+
+
+def endpoint_name(path: str) -> str:
+    for suffix, name in _ENDPOINTS:
+        if path.endswith(suffix):
+            return name
+    return "other"
+
+
+class EndpointLatency:
+    """Request count, error count and latency (to response headers) per endpoint."""
+
+    def __init__(self):
+        self._stats: dict = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, elapsed: float, error: bool = False) -> None:
+        with self._lock:
+            s = self._stats.setdefault(endpoint, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            s["count"] += 1
+            s["errors"] += int(error)
+            s["total"] += elapsed
+            s["max"] = max(s["max"], elapsed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "avg_ms": s["total"] / s["count"] * 1000,
+                    "max_ms": s["max"] * 1000,
+                }
+                for name, s in self._stats.items()
+            }
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Pooled transport that outlives the clients wrapping it.
+
+    Authlib opens (and closes) its own client for every OAuth call; handing it
+    this transport keeps those calls on the shared keep-alive pool. Closing a
+    wrapping client is a no-op here; `KeycloakHTTP.aclose()` closes the pool.
+    """
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, latency: EndpointLatency):
+        self._transport = transport
+        self._latency = latency
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_name(request.url.path)
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self._latency.record(endpoint, time.perf_counter() - start, error=True)
+            raise
+        self._latency.record(endpoint, time.perf_counter() - start, error=response.status_code >= 500)
+        return response
+
+    async def aclose(self) -> None:
+        pass
+
+
+class KeycloakHTTP:
+    """One long-lived async HTTP client for all Keycloak (OIDC) traffic.
+
+    Started and closed by the app lifespan and kept on `app.state.keycloak_http`.
+    """
+
+    def __init__(self):
+        self.latency = EndpointLatency()
+        self.timeout = httpx.Timeout(
+            settings.KEYCLOAK_READ_TIMEOUT,
+            connect=settings.KEYCLOAK_CONNECT_TIMEOUT,
+        )
+        self._pool: httpx.AsyncHTTPTransport | None = None
+        self._transport: _SharedTransport | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    def start(self) -> None:
+        if self._client is not None:
+            return
+        self._pool = httpx.AsyncHTTPTransport(
+            verify=False,
+            limits=httpx.Limits(
+                max_connections=settings.KEYCLOAK_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.KEYCLOAK_MAX_KEEPALIVE,
+                keepalive_expiry=settings.KEYCLOAK_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._transport = _SharedTransport(self._pool, self.latency)
+        self._client = httpx.AsyncClient(transport=self._transport, timeout=self.timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("[Keycloak] HTTP client not started")
+        return self._client
+
+    def client_kwargs(self) -> dict:
+        """httpx kwargs for clients built by Authlib, so they share the pool."""
+        if self._transport is None:
+            raise RuntimeError("[Keycloak] HTTP client not started")
+        return {"transport": self._transport, "timeout": self.timeout}
+
+    async def aclose(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        await self._pool.aclose()
+        self._client = self._transport = self._pool = None
+
+    def stats(self) -> dict:
+        return self.latency.snapshot()
+
+
+keycloak_http = KeycloakHTTP()
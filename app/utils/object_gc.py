@@ -0,0 +1,233 @@
+# app/utils/object_gc.py
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy import select, insert, update, delete, bindparam, func
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db import get_db, files as files_table, object_tombstones
+from app.utils.db_clock import seconds_ago
+from app.utils.thumbnails import variant_base
+
+
+def tombstones_for(rows) -> list[dict]:
+    """Tombstone rows for the objects (and image variants) of deleted `files` rows."""
+    out = []
+    for f in rows:
+        keys = [f["minio_object_key"], *(v["key"] for v in (f["variants"] or {}).values())]
+        out.extend({"minio_bucket": f["minio_bucket"], "minio_object_key": k} for k in keys)
+    return out
+
+
+async def referenced_keys(db, keys: set[str]) -> set[str]:
+    """Keys still in use: referenced by a files row, or a variant of a referenced original."""
+    if not keys:
+        return set()
+    bases = {k: variant_base(k) for k in keys}
+    lookup = keys | {b for b in bases.values() if b}
+    result = await db.execute(
+        select(files_table.c.minio_object_key).where(files_table.c.minio_object_key.in_(lookup)).distinct()
+    )
+    present = set(result.scalars().all())
+    return {k for k in keys if k in present or bases[k] in present}
+
+
+class ObjectReaper:
+    """Drains `object_tombstones`: removes unreferenced objects with S3 multi-delete.
+
+    Each round claims up to GC_BATCH_SIZE tombstones queued at least
+    GC_GRACE_SECONDS ago (FOR UPDATE SKIP LOCKED, so every API worker can run
+    one), re-checks references, deletes per bucket in one request and drops
+    the tombstones. Failed keys are re-queued; a crash simply leaves the
+    tombstones for the next round. Rounds are paced to GC_RATE objects/sec.
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.removed = 0
+        self.kept = 0
+        self.errors = 0
+        self.orphans_queued = 0
+        self.last_batch_at: float | None = None
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self._stop = asyncio.Event()
+
+    async def run_once(self) -> int:
+        """Process one batch of due tombstones; returns how many were handled."""
+        # DB clock on both sides: queued_at is written by the database (func.now())
+        due = seconds_ago(settings.GC_GRACE_SECONDS)
+        async with aclosing(get_db()) as sessions:
+            db = await anext(sessions)
+            try:
+                result = await db.execute(
+                    select(object_tombstones)
+                    .where(object_tombstones.c.queued_at <= due)
+                    .order_by(object_tombstones.c.tombstone_id)
+                    .limit(settings.GC_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )
+                batch = result.mappings().all()
+                if not batch:
+                    await db.rollback()
+                    return 0
+
+                live = await referenced_keys(db, {t["minio_object_key"] for t in batch})
+                by_bucket = defaultdict(set)
+                for t in batch:
+                    if t["minio_object_key"] not in live:
+                        by_bucket[t["minio_bucket"]].add(t["minio_object_key"])
+
+                from app.routes.files import delete_objects
+
+                errors = {}
+                for bucket, keys in by_bucket.items():
+                    failed = await run_in_threadpool(delete_objects, bucket, sorted(keys))
+                    errors.update({(bucket, k): e for k, e in failed.items()})
+
+                retry = [t for t in batch if (t["minio_bucket"], t["minio_object_key"]) in errors]
+                retry_ids = {t["tombstone_id"] for t in retry}
+                done_ids = [t["tombstone_id"] for t in batch if t["tombstone_id"] not in retry_ids]
+                await db.execute(delete(object_tombstones).where(object_tombstones.c.tombstone_id.in_(done_ids)))
+                if retry:
+                    await db.execute(
+                        update(object_tombstones)
+                        .where(object_tombstones.c.tombstone_id == bindparam("tid"))
+                        .values(queued_at=func.now(), attempts=object_tombstones.c.attempts + 1, last_error=bindparam("err")),
+                        [
+                            {"tid": t["tombstone_id"], "err": errors[(t["minio_bucket"], t["minio_object_key"])][:500]}
+                            for t in retry
+                        ],
+                    )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                with self._lock:
+                    self.errors += 1
+                raise
+
+        removed = sum(len(keys) for keys in by_bucket.values()) - len(errors)
+        with self._lock:
+            self.batches += 1
+            self.removed += removed
+            self.kept += len({t["minio_object_key"] for t in batch} & live)
+            self.errors += len(errors)
+            self.last_batch_at = time.time()
+        if errors:
+            print(f"[WARN] {len(errors)} object(s) could not be removed, re-queued: {next(iter(errors.values()))}")
+        print(f"[DEBUG] 🧹 Reaped {len(batch)} tombstones ({removed} objects removed)")
+        return len(batch)
+
+    async def drain(self) -> int:
+        """Process due tombstones until none are left, paced to GC_RATE; returns the total."""
+        total = 0
+        while True:
+            start = time.monotonic()
+            handled = await self.run_once()
+            total += handled
+            if handled < settings.GC_BATCH_SIZE:
+                return total
+            if await self._pace(handled, start):
+                return total
+
+    async def _pace(self, handled: int, start: float) -> bool:
+        """Sleep so the last batch stays within GC_RATE; True if stop was requested meanwhile."""
+        delay = handled / settings.GC_RATE - (time.monotonic() - start)
+        try:
+            await asyncio.wait_for(self._stop.wait(), max(delay, 0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def reconcile(self, prefix: str = "complaints/", start_after: str | None = None) -> dict:
+        """Tombstone objects under `prefix` that no files row references.
+
+        Objects younger than GC_ORPHAN_MIN_AGE are skipped (uploads still in
+        flight, presigned uploads not confirmed yet). Resumable via
+        `start_after` (the last key reported).
+        """
+        from app.routes.files import MINIO_BUCKET, list_objects
+
+        # Compared with MinIO's timezone-aware last_modified, so an aware UTC app-side cutoff is exact
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.GC_ORPHAN_MIN_AGE)
+        listing = list_objects(MINIO_BUCKET, prefix, start_after)
+        scanned = queued = 0
+        while True:
+            page = await run_in_threadpool(lambda: list(islice(listing, settings.GC_BATCH_SIZE)))
+            if not page:
+                break
+            scanned += len(page)
+            old = {key for key, modified in page if modified is None or modified <= cutoff}
+            async with aclosing(get_db()) as sessions:
+                db = await anext(sessions)
+                try:
+                    live = await referenced_keys(db, old)
+                    result = await db.execute(
+                        select(object_tombstones.c.minio_object_key).where(
+                            object_tombstones.c.minio_bucket == MINIO_BUCKET,
+                            object_tombstones.c.minio_object_key.in_(old - live),
+                        )
+                    )
+                    orphans = sorted(old - live - set(result.scalars().all()))
+                    if orphans:
+                        # Nothing can start referencing an object without a files row, so orphans are due at once
+                        await db.execute(
+                            insert(object_tombstones).values(queued_at=seconds_ago(settings.GC_GRACE_SECONDS)),
+                            [{"minio_bucket": MINIO_BUCKET, "minio_object_key": k} for k in orphans],
+                        )
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+            queued += len(orphans)
+            print(f"[DEBUG] 🔎 Scanned {scanned} objects, {queued} orphans queued (last key {page[-1][0]})")
+        with self._lock:
+            self.orphans_queued += queued
+        return {"scanned": scanned, "queued": queued}
+
+    async def _loop(self) -> None:
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                print(f"[ERROR] Object GC batch failed: {e}")
+                handled = 0
+            if handled >= settings.GC_BATCH_SIZE:
+                await self._pace(handled, start)
+                continue
+            try:
+                await asyncio.wait_for(self._stop.wait(), settings.GC_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        # Fresh event per start: the app lifespan may run on a new event loop each time
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "removed": self.removed,
+                "kept_referenced": self.kept,
+                "errors": self.errors,
+                "orphans_queued": self.orphans_queued,
+                "last_batch_at": self.last_batch_at,
+            }
+
+
+object_reaper = ObjectReaper()
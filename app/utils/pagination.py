@@ -0,0 +1,70 @@
+# app/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (created_at, id) position."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+
+def keyset_before(created_col, id_col, cursor: str):
+    """WHERE clause for rows after `cursor` in (created_at DESC, id DESC) order."""
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_col < created_at,
+        and_(created_col == created_at, id_col < row_id),
+    )
+
+
+def keyset_after(created_col, id_col, cursor: str):
+    """WHERE clause for rows after `cursor` in (created_at ASC, id ASC) order."""
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_col > created_at,
+        and_(created_col == created_at, id_col > row_id),
+    )
+
+
+def page_of(rows: list, limit: int, created_key: str, id_key: str) -> tuple[list, str | None]:
+    """Split a `limit + 1` fetch into (page, next_cursor)."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last[created_key], last[id_key])
+
+
+def encode_rank_cursor(score: int, row_id: int) -> str:
+    """Opaque keyset cursor for an (integer relevance score, id) position."""
+    raw = json.dumps({"s": score, "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def rank_before(score_expr, id_col, cursor: str):
+    """WHERE clause for rows after `cursor` in (score DESC, id DESC) order.
+
+    `score_expr` must be an integer expression; floats would make the
+    equality half of the comparison unreliable.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        score, row_id = int(data["s"]), int(data["i"])
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+    return tuple_(score_expr, id_col) < tuple_(score, row_id)
@@ -0,0 +1,139 @@
+# app/utils/reference_cache.py
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import aclosing
+from types import SimpleNamespace
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import get_db, categories, departments
+
+
+def _etag(encoded) -> str:
+    return f'"{hashlib.sha1(json.dumps(encoded, sort_keys=True).encode()).hexdigest()}"'
+
+
+class ReferenceCache:
+    """Versioned in-process snapshot of the `categories` and `departments` tables.
+
+    The snapshot is reloaded when older than `ttl`, or when a lookup misses
+    (at most once per `min_reload_interval`, so bad ids can't trigger a
+    reload storm). The tables are edited outside the API, so `start()` also
+    reloads it every `refresh_interval` seconds in the background; requests
+    then rarely wait on a TTL reload.
+    """
+
+    def __init__(self, ttl: float, min_reload_interval: float = 1.0, refresh_interval: float = 0.0):
+        self.ttl = ttl
+        self.min_reload_interval = min_reload_interval
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._snapshot: SimpleNamespace | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def _load(self, db) -> None:
+        result = await db.execute(select(categories).order_by(categories.c.category_id))
+        cats = [dict(r) for r in result.mappings().all()]
+        result = await db.execute(select(departments).order_by(departments.c.department_id))
+        depts = [dict(r) for r in result.mappings().all()]
+
+        etag = _etag(jsonable_encoder([cats, depts]))
+        if self._snapshot is None or self._snapshot.etag != etag:
+            self.version += 1
+
+        self._snapshot = SimpleNamespace(
+            version=self.version,
+            etag=etag,
+            categories=cats,
+            departments=depts,
+            category_ids={c["category_id"] for c in cats},
+            department_by_id={d["department_id"]: d for d in depts},
+        )
+        self._loaded_at = time.monotonic()
+
+    async def get(self, db, force: bool = False) -> SimpleNamespace:
+        if not force and self._snapshot is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return self._snapshot
+        async with self._lock:
+            # Another waiter may have reloaded while we queued on the lock
+            if self._snapshot is None or time.monotonic() - self._loaded_at >= (
+                self.min_reload_interval if force else self.ttl
+            ):
+                await self._load(db)
+        return self._snapshot
+
+    async def refresh(self) -> None:
+        """Reload the snapshot on a session of its own."""
+        async with aclosing(get_db()) as sessions:
+            db = await anext(sessions)
+            async with self._lock:
+                await self._load(db)
+
+    async def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[WARN] Reference cache refresh failed, keeping the last snapshot: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self.refresh_interval <= 0:
+            return
+        # Fresh event per start: the app lifespan may run on a new event loop each time
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def has_category(self, db, category_id: int) -> bool:
+        snap = await self.get(db)
+        if category_id in snap.category_ids:
+            return True
+        return category_id in (await self.get(db, force=True)).category_ids
+
+    async def has_department(self, db, department_id: int) -> bool:
+        snap = await self.get(db)
+        if department_id in snap.department_by_id:
+            return True
+        return department_id in (await self.get(db, force=True)).department_by_id
+
+
+reference_cache = ReferenceCache(
+    ttl=settings.REFERENCE_CACHE_TTL,
+    refresh_interval=settings.REFERENCE_CACHE_REFRESH_INTERVAL,
+)
+
+
+def cached_json(request: Request, content) -> Response:
+    """JSON response with ETag/Cache-Control, or 304 if the client copy is current.
+
+    The ETag hashes the encoded body, so filtered and single-row responses get
+    their own tag and stay valid while unrelated rows change.
+    """
+    encoded = jsonable_encoder(content)
+    etag = _etag(encoded)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.REFERENCE_CACHE_MAX_AGE}",
+    }
+    client_tags = [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=encoded, headers=headers)
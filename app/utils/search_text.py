@@ -0,0 +1,51 @@
+# app/utils/search_text.py
+import re
+import unicodedata
+
+# Complaint columns that feed the search document
+SEARCH_FIELDS = ("original_text", "processed_text", "location", "location_details")
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(unicodedata.normalize("NFKC", text).lower())
+
+
+def _encode(gram: str) -> str:
+    # Hex keeps every token a plain [0-9a-z] word of >= 3 chars, so the stock
+    # InnoDB FULLTEXT parser (no ngram parser on MariaDB) indexes it as-is.
+    return "x" + gram.encode().hex()
+
+
+def ngram_tokens(text: str | None) -> list[str]:
+    """Distinct bigram tokens of `text`; one-character words index as themselves.
+
+    Bigrams let Korean match inside words without a morphological analyzer
+    (e.g. "도로" matches "도로파손"), and work the same for Latin text.
+    """
+    if not text:
+        return []
+    seen: dict[str, None] = {}
+    for word in _words(text):
+        grams = [word] if len(word) == 1 else [word[i:i + 2] for i in range(len(word) - 1)]
+        for g in grams:
+            seen.setdefault(_encode(g), None)
+    return list(seen)
+
+
+def search_document(values: dict) -> str:
+    """Value of complaints.search_ngrams for a row's searchable fields."""
+    tokens: dict[str, None] = {}
+    for field in SEARCH_FIELDS:
+        for t in ngram_tokens(values.get(field)):
+            tokens.setdefault(t, None)
+    return " ".join(tokens)
+
+
+def search_query(q: str) -> str | None:
+    """BOOLEAN MODE query requiring every bigram of `q`; None if `q` has no words."""
+    tokens = ngram_tokens(q)
+    if not tokens:
+        return None
+    return " ".join(f"+{t}" for t in tokens)
@@ -0,0 +1,78 @@
+# app/utils/session_middleware.py
+import json
+import secrets
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _fingerprint(data: dict) -> str:
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+class ServerSessionMiddleware:
+    """Drop-in for Starlette's SessionMiddleware that keeps `request.session`
+    in a server-side store; the cookie only carries an opaque session id.
+
+    The session is written back only when it changed, deleted when it was
+    cleared, and gets a fresh id when the logged-in user changes (login).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store,
+        session_cookie: str = "session",
+        max_age: int = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+    ):
+        self.app = app
+        self.store = store
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.flags = f"path={path}; httponly; samesite={same_site}"
+        if https_only:
+            self.flags += "; secure"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        sid = HTTPConnection(scope).cookies.get(self.session_cookie)
+        data = await self.store.get(sid) if sid else None
+        if data is None:
+            sid, data = None, {}
+        scope["session"] = data
+        initial = _fingerprint(data)
+        initial_user = data.get("user")
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal sid
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                headers = MutableHeaders(scope=message)
+                if session:
+                    if sid is None or _fingerprint(session) != initial:
+                        if sid is not None and session.get("user") != initial_user:
+                            await self.store.delete(sid)
+                            sid = None
+                        if sid is None:
+                            sid = secrets.token_urlsafe(32)
+                        await self.store.set(sid, session)
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}={sid}; max-age={self.max_age}; {self.flags}",
+                    )
+                elif sid is not None:
+                    await self.store.delete(sid)
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.flags}",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,123 @@
+# app/utils/session_store.py
+import json
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+
+def _user_id(data: dict):
+    return (data.get("user") or {}).get("user_id")
+
+
+class MemorySessionStore:
+    """Per-process LRU of session id -> session dict with sliding expiry.
+
+    Sessions are stored as JSON so every request works on its own copy.
+    """
+
+    def __init__(self, ttl: int, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._by_user: dict = {}
+
+    def _drop(self, sid: str) -> None:
+        entry = self._entries.pop(sid, None)
+        if entry is None or entry[2] is None:
+            return
+        sids = self._by_user.get(entry[2])
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._by_user[entry[2]]
+
+    async def get(self, sid: str) -> dict | None:
+        entry = self._entries.get(sid)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry[0] <= now:
+            self._drop(sid)
+            return None
+        self._entries[sid] = (now + self.ttl, entry[1], entry[2])
+        self._entries.move_to_end(sid)
+        return json.loads(entry[1])
+
+    async def set(self, sid: str, data: dict) -> None:
+        self._drop(sid)
+        user_id = _user_id(data)
+        self._entries[sid] = (time.monotonic() + self.ttl, json.dumps(data), user_id)
+        if user_id is not None:
+            self._by_user.setdefault(user_id, set()).add(sid)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    async def delete(self, sid: str) -> None:
+        self._drop(sid)
+
+    async def revoke_user(self, user_id) -> int:
+        sids = list(self._by_user.get(user_id, ()))
+        for sid in sids:
+            self._drop(sid)
+        return len(sids)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RedisSessionStore:
+    """Sessions in a Redis-compatible key-value server, shared by every worker.
+
+    Each read slides the expiry (GETEX); a per-user set of session ids
+    backs `revoke_user()`.
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "minwon:session:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, sid: str) -> str:
+        return f"{self.prefix}{sid}"
+
+    def _user_key(self, user_id) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    async def get(self, sid: str) -> dict | None:
+        raw = await self.client.getex(self._key(sid), ex=self.ttl)
+        return json.loads(raw) if raw else None
+
+    async def set(self, sid: str, data: dict) -> None:
+        user_id = _user_id(data)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key(sid), json.dumps(data), ex=self.ttl)
+        if user_id is not None:
+            pipe.sadd(self._user_key(user_id), sid)
+            pipe.expire(self._user_key(user_id), self.ttl)
+        await pipe.execute()
+
+    async def delete(self, sid: str) -> None:
+        await self.client.delete(self._key(sid))
+
+    async def revoke_user(self, user_id) -> int:
+        sids = await self.client.smembers(self._user_key(user_id))
+        keys = [self._key(s.decode() if isinstance(s, bytes) else s) for s in sids]
+        if keys:
+            await self.client.delete(*keys)
+        await self.client.delete(self._user_key(user_id))
+        return len(keys)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def create_session_store():
+    """Session store for SESSION_BACKEND ("memory" or "redis"); connects lazily."""
+    if settings.SESSION_BACKEND == "memory":
+        return MemorySessionStore(ttl=settings.SESSION_TTL, maxsize=settings.SESSION_MAX_ENTRIES)
+    if settings.SESSION_BACKEND == "redis":
+        from redis import asyncio as aioredis
+
+        return RedisSessionStore(aioredis.from_url(settings.SESSION_REDIS_URL), ttl=settings.SESSION_TTL)
+    raise ValueError(f"[Session] Unknown session backend: {settings.SESSION_BACKEND}")
@@ -0,0 +1,188 @@
+# app/utils/single_flight.py
+import asyncio
+import hashlib
+import json
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Hashable
+
+from sqlalchemy import select, insert, delete, or_, func, text
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.db_clock import seconds_from_now
+
+
+class LocalLockBackend:
+    """No cross-process locking; `SingleFlight` already serializes per key in-process."""
+
+    @asynccontextmanager
+    async def lock(self, name: str):
+        # Nothing shared: results live in the SingleFlight's own cache
+        yield None
+
+
+class _SharedResult:
+    """The stored result for one lock name, read and written on the connection holding the lock."""
+
+    def __init__(self, conn, name: str):
+        self.conn = conn
+        self.name = name
+
+    async def get(self) -> str | None:
+        from app.db import single_flight_results as t
+
+        def load():
+            value = self.conn.execute(
+                select(t.c.value).where(t.c.name == self.name, t.c.expires_at > func.now())
+            ).scalar()
+            self.conn.commit()
+            return value
+
+        return await run_in_threadpool(load)
+
+    async def put(self, value: str, ttl: float) -> None:
+        from app.db import single_flight_results as t
+
+        def store():
+            # Expired rows of other names go too, so the table stays small
+            self.conn.execute(delete(t).where(or_(t.c.name == self.name, t.c.expires_at <= func.now())))
+            self.conn.execute(insert(t).values(name=self.name, value=value, expires_at=seconds_from_now(math.ceil(ttl))))
+            self.conn.commit()
+
+        await run_in_threadpool(store)
+
+
+class MariaDBLockBackend:
+    """Named locks via GET_LOCK()/RELEASE_LOCK(), shared by every worker on the database.
+
+    The lock is tied to the connection, so one pooled connection is held for
+    as long as the lock is. Results are shared through `single_flight_results`
+    on that connection: written (and committed) before the lock is released,
+    so the next holder sees them.
+    """
+
+    def __init__(self, timeout: int):
+        self.timeout = timeout
+
+    @asynccontextmanager
+    async def lock(self, name: str):
+        from database.registry import registry
+
+        conn = await run_in_threadpool(registry.engine().connect)
+        try:
+            got = await run_in_threadpool(
+                lambda: conn.execute(text("SELECT GET_LOCK(:n, :t)"), {"n": name, "t": self.timeout}).scalar()
+            )
+            if got != 1:
+                raise TimeoutError(f"[Lock] Timed out waiting for {name}")
+            try:
+                # Named locks outlive transactions; end this one so reads see the last holder's writes
+                await run_in_threadpool(conn.commit)
+                yield _SharedResult(conn, name)
+            finally:
+                await run_in_threadpool(lambda: conn.execute(text("SELECT RELEASE_LOCK(:n)"), {"n": name}))
+        finally:
+            await run_in_threadpool(conn.close)
+
+
+def get_lock_backend(kind: str, timeout: int):
+    if kind == "local":
+        return LocalLockBackend()
+    if kind == "mariadb":
+        return MariaDBLockBackend(timeout)
+    raise ValueError(f"[Lock] Unknown lock backend: {kind}")
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result.
+
+    The call runs as its own task, so a waiter being cancelled (client gone)
+    doesn't cancel it for the others. Successful results are reused for
+    `result_ttl` seconds to absorb requests that arrive just after the call
+    finished; `start()` runs a call in the background and `peek()` picks up
+    its result later. The lock backend serializes the same key across workers
+    and, if it can share results, a worker that waited on the lock takes the
+    result stored by the holder instead of making the call again. `codec`
+    (dumps, loads) turns results into the text stored there.
+    """
+
+    def __init__(self, backend, result_ttl: float = 0.0, namespace: str = "minwon", codec=(json.dumps, json.loads)):
+        self.backend = backend
+        self.result_ttl = result_ttl
+        self.namespace = namespace
+        self.dumps, self.loads = codec
+        self.shared_hits = 0
+        self.started = 0
+        self.coalesced = 0
+        self._flights: dict = {}
+        self._results: dict = {}
+
+    def _lock_name(self, key: Hashable) -> str:
+        # MariaDB lock names are limited to 64 characters
+        return f"{self.namespace}:{hashlib.sha1(repr(key).encode()).hexdigest()}"
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable], result_ttl: float):
+        async with self.backend.lock(self._lock_name(key)) as shared:
+            stored = await shared.get() if shared is not None and result_ttl > 0 else None
+            if stored is not None:
+                # Another worker made this call while we waited for the lock
+                self.shared_hits += 1
+                result = self.loads(stored)
+            else:
+                result = await fn()
+                if shared is not None and result_ttl > 0 and result is not None:
+                    await shared.put(self.dumps(result), result_ttl)
+        if result_ttl > 0:
+            now = time.monotonic()
+            for k in [k for k, (exp, _) in self._results.items() if exp <= now]:
+                del self._results[k]
+            self._results[key] = (now + result_ttl, result)
+        return result
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[WARN] single-flight call failed for {self.namespace}: {task.exception()}")
+
+    def peek(self, key: Hashable):
+        """Result of a finished call for `key` that is still within its TTL, else None."""
+        cached = self._results.get(key)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            del self._results[key]
+            return None
+        return cached[1]
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable], result_ttl: float | None = None) -> asyncio.Task:
+        """Start the call for `key` (or join the running one) without waiting for it."""
+        task = self._flights.get(key)
+        if task is None:
+            self.started += 1
+            ttl = self.result_ttl if result_ttl is None else result_ttl
+            task = asyncio.ensure_future(self._run(key, fn, ttl))
+            task.add_done_callback(lambda t: self._finished(key, t))
+            self._flights[key] = task
+        else:
+            self.coalesced += 1
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        cached = self.peek(key)
+        if cached is not None:
+            self.coalesced += 1
+            return cached
+        return await asyncio.shield(self.start(key, fn))
+
+    def forget(self, key: Hashable) -> None:
+        self._results.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "shared_hits": self.shared_hits,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,184 @@
+# app/utils/thumbnails.py
+import asyncio
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing
+
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db import get_db, files as files_table
+
+_CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+_EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+def variant_key(object_key: str, size: str, fmt: str) -> str:
+    """Derived object key next to the original: complaints/7/ab12.jpg -> complaints/7/ab12.jpg.thumb.webp"""
+    return f"{object_key}.{size}.{_EXTENSIONS[fmt]}"
+
+
+def variant_base(object_key: str) -> str | None:
+    """Original key of a derived variant key, None for an original.
+
+    Stored names are "<uuid hex><ext>" or a bare blob digest (at most one dot);
+    variants add ".<size>.<ext>".
+    """
+    if object_key.rpartition("/")[2].count(".") < 2:
+        return None
+    return object_key.rsplit(".", 2)[0]
+
+
+def render_variants(data: bytes, sizes: dict[str, int], fmt: str, quality: int) -> dict[str, tuple]:
+    """Decode once and encode every size, largest first (runs in a pool process).
+
+    Returns {size: (encoded bytes, width, height)}; images are never upscaled.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as src:
+        # JPEG: let the decoder downscale by 1/2..1/8 while reading
+        src.draft("RGB", (max(sizes.values()),) * 2)
+        img = ImageOps.exif_transpose(src)
+        keep_alpha = fmt == "WEBP" and (img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info)
+        if img.mode != ("RGBA" if keep_alpha else "RGB"):
+            img = img.convert("RGBA" if keep_alpha else "RGB")
+
+        options = {"method": 4} if fmt == "WEBP" else {"optimize": True}
+        out = {}
+        for name, edge in sorted(sizes.items(), key=lambda kv: -kv[1]):
+            img.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            buf = io.BytesIO()
+            img.save(buf, fmt, quality=quality, **options)
+            out[name] = (buf.getvalue(), img.width, img.height)
+        return out
+
+
+class ThumbnailPipeline:
+    """Generates downscaled variants of uploaded images after the upload response.
+
+    Originals are read back from MinIO, resized in a process pool, written
+    under derived keys next to the original and recorded in `files.variants`.
+    A failure only leaves the file without variants; downloads then fall back
+    to the original.
+    """
+
+    def __init__(self):
+        self.generated = 0
+        self.reused = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_PROCESSES)
+            return self._pool
+
+    async def _variants_for(self, row: dict) -> dict:
+        from app.routes.files import read_object, write_object
+
+        fmt = settings.THUMBNAIL_FORMAT.upper()
+        data = await run_in_threadpool(read_object, row["minio_bucket"], row["minio_object_key"])
+        rendered = await asyncio.get_running_loop().run_in_executor(
+            self._executor(), render_variants, data, settings.THUMBNAIL_SIZES, fmt, settings.THUMBNAIL_QUALITY
+        )
+        variants = {}
+        for name, (blob, width, height) in rendered.items():
+            key = variant_key(row["minio_object_key"], name, fmt)
+            await run_in_threadpool(write_object, row["minio_bucket"], key, blob, _CONTENT_TYPES[fmt])
+            variants[name] = {
+                "key": key,
+                "content_type": _CONTENT_TYPES[fmt],
+                "width": width,
+                "height": height,
+                "bytes": len(blob),
+            }
+        with self._lock:
+            self.bytes_in += len(data)
+            self.bytes_out += sum(len(blob) for blob, _, _ in rendered.values())
+        return variants
+
+    async def generate(self, rows: list[dict]) -> int:
+        """Render and record variants for the IMAGE rows (dicts with file_id and MinIO location)."""
+        if not settings.THUMBNAIL_ENABLED:
+            return 0
+        rows = [r for r in rows if r["file_type"] == "IMAGE"]
+        if not rows:
+            return 0
+
+        # Files sharing an object (same content) share its variants: render each object once
+        async with aclosing(get_db()) as sessions:
+            db = await anext(sessions)
+            result = await db.execute(
+                select(files_table.c.minio_object_key, files_table.c.variants)
+                .where(
+                    files_table.c.minio_object_key.in_({r["minio_object_key"] for r in rows}),
+                    files_table.c.variants.is_not(None),
+                )
+            )
+            by_key = {r["minio_object_key"]: r["variants"] for r in result.mappings()}
+        todo = {r["minio_object_key"]: r for r in rows if r["minio_object_key"] not in by_key}
+
+        results = await asyncio.gather(*(self._variants_for(r) for r in todo.values()), return_exceptions=True)
+        for (key, row), res in zip(todo.items(), results):
+            if isinstance(res, BaseException):
+                print(f"[WARN] Thumbnail generation failed for file {row['file_id']}: {res}")
+                with self._lock:
+                    self.failed += 1
+            else:
+                by_key[key] = res
+        done = [(r, by_key[r["minio_object_key"]]) for r in rows if r["minio_object_key"] in by_key]
+        if not done:
+            return 0
+
+        async with aclosing(get_db()) as sessions:
+            db = await anext(sessions)
+            try:
+                for row, variants in done:
+                    await db.execute(
+                        update(files_table)
+                        .where(files_table.c.file_id == row["file_id"])
+                        .values(variants=variants)
+                    )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        rendered = sum(1 for key in todo if key in by_key)
+        with self._lock:
+            self.generated += rendered
+            self.reused += len(done) - rendered
+        print(f"[DEBUG] 🖼️ Recorded variants for {len(done)} image(s), {rendered} rendered")
+        return len(done)
+
+    async def generate_quietly(self, rows: list[dict]) -> None:
+        """Background-task entry point: never raises into the response cycle."""
+        try:
+            await self.generate(rows)
+        except Exception as e:
+            print(f"[ERROR] Thumbnail pipeline failed: {e}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "generated": self.generated,
+                "reused": self.reused,
+                "failed": self.failed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
+
+
+thumbnail_pipeline = ThumbnailPipeline()
@@ -0,0 +1,137 @@
+# app/utils/upload_stream.py
+import hashlib
+from typing import AsyncIterator
+
+import anyio
+from anyio.from_thread import run as run_from_thread
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+async def iter_multipart(request: Request) -> AsyncIterator[tuple]:
+    """Parse a multipart body as it arrives, without spooling.
+
+    Yields ("begin", field_name, filename, content_type), ("data", bytes) and
+    ("end",) events in body order. `filename` is None for plain form fields.
+    """
+    _, params = parse_options_header(request.headers.get("content-type"))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(400, "Expected a multipart/form-data body")
+
+    events: list[tuple] = []
+    headers: dict[bytes, bytes] = {}
+    header = {"name": b"", "value": b""}
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        headers[header["name"].lower()] = header["value"]
+        header["name"], header["value"] = b"", b""
+
+    def on_headers_finished():
+        _, opts = parse_options_header(headers.get(b"content-disposition"))
+        name = opts.get(b"name", b"").decode()
+        filename = opts[b"filename"].decode() if b"filename" in opts else None
+        content_type = headers.get(b"content-type", b"").decode() or None
+        events.append(("begin", name, filename, content_type))
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end",))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for event in events:
+            yield event
+        events.clear()
+    parser.finalize()
+    for event in events:
+        yield event
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadAborted(Exception):
+    pass
+
+
+class StreamingPart:
+    """Bridge one multipart file part from the event loop to a blocking reader.
+
+    The request handler `feed()`s chunks (counting size and hashing them as they
+    pass); a worker thread consumes them through the file-like `read()`, e.g.
+    MinIO `put_object(length=-1)`. The bounded buffer applies backpressure so at
+    most `buffer_chunks` chunks are held in memory. If the reader stops early,
+    `feed()` raises `anyio.BrokenResourceError` instead of blocking.
+    """
+
+    def __init__(self, max_size: int, buffer_chunks: int = 8):
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self._send, self._receive = anyio.create_memory_object_stream(buffer_chunks)
+        self._buf = bytearray()
+        self._eof = False
+        self._aborted = False
+
+    async def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            await self.abort()
+            raise UploadTooLarge(f"File exceeds {self.max_size} bytes")
+        self.sha256.update(chunk)
+        await self._send.send(chunk)
+
+    async def close(self) -> None:
+        await self._send.aclose()
+
+    async def abort(self) -> None:
+        # Makes the reader raise, so an in-progress multipart upload is aborted
+        self._aborted = True
+        await self._send.aclose()
+
+    def reader_done(self) -> None:
+        """Called from the reader thread when it stops consuming."""
+        run_from_thread(self._receive.aclose)
+
+    def read(self, n: int = -1) -> bytes:
+        while not self._eof and (n < 0 or len(self._buf) < n):
+            try:
+                chunk = run_from_thread(self._receive.receive)
+            except anyio.EndOfStream:
+                self._eof = True
+            if self._aborted:
+                raise UploadAborted("Upload aborted")
+            if not self._eof:
+                self._buf += chunk
+        if n < 0 or n > len(self._buf):
+            n = len(self._buf)
+        out = bytes(self._buf[:n])
+        del self._buf[:n]
+        return out
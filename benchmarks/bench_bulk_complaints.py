@@ -0,0 +1,74 @@
+"""Throughput of POST /api/complaints/create vs POST /api/complaints/bulk.
+
+Runs the app in-process (ASGI transport, no network hop) against the
+configured database, authenticated as --user-id, and inserts --count
+complaints each way. Created rows are deleted afterwards.
+
+    python -m benchmarks.bench_bulk_complaints --count 2000 --batch 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import delete
+
+from app.main import app
+from app.auth import get_current_user
+from app.db import complaints
+from database.registry import registry
+
+
+def _item(i: int, category_id: int | None) -> dict:
+    return {"input_text": f"bench complaint {i}", "location": "bench", "category_id": category_id}
+
+
+async def _single(client: httpx.AsyncClient, count: int, concurrency: int, category_id) -> list[int]:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> int:
+        async with sem:
+            resp = await client.post("/api/complaints/create", json=_item(i, category_id))
+            resp.raise_for_status()
+            return resp.json()["complaint_id"]
+
+    return list(await asyncio.gather(*(one(i) for i in range(count))))
+
+
+async def _bulk(client: httpx.AsyncClient, count: int, batch: int, category_id) -> list[int]:
+    ids: list[int] = []
+    for start in range(0, count, batch):
+        items = [_item(i, category_id) for i in range(start, min(start + batch, count))]
+        resp = await client.post("/api/complaints/bulk", json={"items": items})
+        resp.raise_for_status()
+        ids += [r["complaint_id"] for r in resp.json()["results"] if "complaint_id" in r]
+    return ids
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--category-id", type=int, default=None)
+    args = parser.parse_args()
+
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": args.user_id, "roles": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, run in (
+            ("single", lambda: _single(client, args.count, args.concurrency, args.category_id)),
+            ("bulk", lambda: _bulk(client, args.count, args.batch, args.category_id)),
+        ):
+            start = time.perf_counter()
+            ids = await run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>6}: {len(ids)} complaints in {elapsed:.2f}s -> {len(ids) / elapsed:,.0f}/s")
+            with registry.engine().begin() as conn:
+                conn.execute(delete(complaints).where(complaints.c.complaint_id.in_(ids)))
+    await registry.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""Compare DB access modes under high concurrency.
+
+Modes:
+  blocking  sync Session called directly on the event loop (old behaviour)
+  sync      sync Session run in the threadpool (DB_MODE=sync)
+  async     AsyncSession over aiomysql
+
+Each mode runs --requests coroutines with at most --concurrency in flight
+and reports throughput, latency percentiles and the worst event-loop stall.
+
+    python -m benchmarks.bench_db_modes --concurrency 200 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+
+def _async_url(url: str) -> str:
+    return os.getenv("ASYNC_DATABASE_URL") or url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
+
+async def _loop_lag_monitor(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(mode: str, url: str, query: str, concurrency: int, requests: int, pool_size: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    stmt = text(query)
+
+    if mode == "async":
+        engine = create_async_engine(_async_url(url), pool_size=pool_size, max_overflow=0)
+        Session = async_sessionmaker(engine)
+
+        async def one():
+            async with Session() as db:
+                (await db.execute(stmt)).all()
+    else:
+        engine = create_engine(url, pool_size=pool_size, max_overflow=0)
+        Session = sessionmaker(bind=engine)
+
+        def query_sync():
+            with Session() as db:
+                db.execute(stmt).all()
+
+        if mode == "blocking":
+            async def one():
+                query_sync()
+        else:
+            async def one():
+                await run_in_threadpool(query_sync)
+
+    async def timed():
+        async with sem:
+            start = time.perf_counter()
+            await one()
+            latencies.append(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_loop_lag_monitor(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    worst_lag = await monitor
+
+    if mode == "async":
+        await engine.dispose()
+    else:
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_loop_lag_ms": worst_lag * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--query", default="SELECT 1")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--modes", default="blocking,sync,async")
+    args = parser.parse_args()
+
+    if not args.url:
+        raise SystemExit("DATABASE_URL (or --url) is required")
+
+    print(f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'loop lag ms':>14}")
+    for mode in args.modes.split(","):
+        r = asyncio.run(_run(mode, args.url, args.query, args.concurrency, args.requests, args.pool_size))
+        print(f"{r['mode']:<10}{r['rps']:>10.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_loop_lag_ms']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Peak Python memory of the streaming complaint export vs loading everything.
+
+Grows the complaints table in --steps up to --rows (synthetic rows for
+--user-id), and at each size measures the tracemalloc peak of
+  stream  the export generator behind GET /api/complaints/export
+  all     the same query through `.mappings().all()` + json encoding
+The stream column should stay flat while `all` grows with the row count.
+Seeded rows are deleted at the end.
+
+    python -m benchmarks.bench_export_memory --rows 200000 --steps 4
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from sqlalchemy import delete, insert, select
+
+from app.db import complaints
+from app.routes.complaints import _COLUMNS, _export_rows
+from database.registry import registry
+
+MARK = "bench-export"
+
+
+def _seed(engine, count: int, user_id: int, batch: int = 5000) -> None:
+    with engine.begin() as conn:
+        for offset in range(0, count, batch):
+            conn.execute(insert(complaints), [
+                {
+                    "user_id": user_id,
+                    "submission_type": "TEXT",
+                    "original_text": "민원 내용 " * 20,
+                    "location": MARK,
+                    "status": "SUBMITTED",
+                }
+                for _ in range(min(batch, count - offset))
+            ])
+
+
+def _measure(fn) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--steps", type=int, default=4)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv"])
+    args = parser.parse_args()
+
+    engine = registry.engine()
+    stmt = select(*_COLUMNS).where(complaints.c.location == MARK).order_by(complaints.c.complaint_id)
+
+    def stream():
+        for _ in _export_rows(stmt, args.format, include_files=True):
+            pass
+
+    def load_all():
+        with engine.connect() as conn:
+            rows = conn.execute(stmt).mappings().all()
+            "\n".join(json.dumps(dict(r), default=str, ensure_ascii=False) for r in rows).encode()
+
+    seeded = 0
+    try:
+        print(f"{'rows':>10} {'stream MiB':>11} {'stream s':>9} {'all MiB':>9} {'all s':>7}")
+        for step in range(1, args.steps + 1):
+            target = args.rows * step // args.steps
+            _seed(engine, target - seeded, args.user_id)
+            seeded = target
+            s_mem, s_time = _measure(stream)
+            a_mem, a_time = _measure(load_all)
+            print(f"{seeded:>10} {s_mem:>11.1f} {s_time:>9.2f} {a_mem:>9.1f} {a_time:>7.2f}")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(complaints).where(complaints.c.location == MARK))
+
+
+if __name__ == "__main__":
+    main()
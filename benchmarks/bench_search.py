@@ -0,0 +1,82 @@
+"""Latency of GET /api/complaints/search on the configured database.
+
+Optionally seeds --seed synthetic Korean complaints for --user-id first
+(left in place so later runs can reuse them), then issues --requests
+searches with --concurrency in flight and reports latency percentiles.
+
+    python -m benchmarks.bench_search --seed 1000000 --requests 500
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+from sqlalchemy import insert
+
+from app.main import app
+from app.auth import get_current_user
+from app.db import complaints
+from app.utils.search_text import search_document
+from database.registry import registry
+
+PLACES = ["서울시 강남구", "부산시 해운대구", "대구시 중구", "인천시 연수구", "광주시 북구"]
+TOPICS = ["도로 파손", "가로등 고장", "불법 주차", "쓰레기 무단 투기", "소음 민원", "보도블록 들뜸", "신호등 오류"]
+QUERIES = ["도로", "가로등 고장", "불법주차", "쓰레기", "해운대", "신호등", "보도블록"]
+
+
+def seed(count: int, user_id: int, batch: int = 5000) -> None:
+    rnd = random.Random(0)
+    engine = registry.engine()
+    for start in range(0, count, batch):
+        rows = []
+        for _ in range(min(batch, count - start)):
+            row = {
+                "user_id": user_id,
+                "submission_type": "TEXT",
+                "original_text": f"{rnd.choice(TOPICS)} 신고합니다. {rnd.choice(TOPICS)} 관련 조치 부탁드립니다.",
+                "location": rnd.choice(PLACES),
+                "location_details": f"{rnd.randint(1, 300)}번지 앞",
+                "status": "SUBMITTED",
+            }
+            row["search_ngrams"] = search_document(row)
+            rows.append(row)
+        with engine.begin() as conn:
+            conn.execute(insert(complaints), rows)
+        print(f"seeded {start + len(rows)}/{count}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed, args.user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": args.user_id, "roles": []}
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i: int) -> None:
+            async with sem:
+                start = time.perf_counter()
+                resp = await client.get("/api/complaints/search", params={"q": QUERIES[i % len(QUERIES)]})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+    await registry.dispose()
+
+    ms = sorted(x * 1000 for x in latencies)
+    print(f"search: p50 {statistics.median(ms):.1f} ms, p95 {ms[int(len(ms) * 0.95) - 1]:.1f} ms, "
+          f"max {ms[-1]:.1f} ms ({args.requests} requests, concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
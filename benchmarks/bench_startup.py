@@ -0,0 +1,72 @@
+"""Measure `import app.main` time and guard against import-time I/O.
+
+Each run imports the app in a fresh interpreter with the database and MinIO
+pointed at an unroutable address, so any connection attempt at import shows
+up as a slow (or failed) run. Exits non-zero if the median exceeds --max-ms.
+
+    python -m benchmarks.bench_startup --runs 10 --max-ms 2500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BLACKHOLE = "10.255.255.1"
+
+SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"mysql+pymysql://u:p@{BLACKHOLE}:3306/minwon?charset=utf8mb4",
+        "MARIADB_HOST": BLACKHOLE,
+        "POSTGRES_HOST": BLACKHOLE,
+        "MINIO_ENDPOINT": f"{BLACKHOLE}:9000",
+        "ISSUER_BASE_URL": f"http://{BLACKHOLE}/realms/minwon",
+    })
+    for key in ("BASE_URL", "CLIENT_ID", "CLIENT_SECRET", "REALM", "SESSION_SECRET",
+                "MARIADB_USER", "MARIADB_PASSWORD", "MARIADB_PORT", "MARIADB_DATABASE",
+                "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_PORT", "POSTGRES_DATABASE",
+                "MINIO_ACCESS_KEY", "MINIO_SECRET_KEY"):
+        env.setdefault(key, "bench")
+    env["PYTHONPATH"] = str(ROOT)
+    return env
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=2500.0)
+    parser.add_argument("--timeout", type=float, default=20.0)
+    args = parser.parse_args()
+
+    env = _env()
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", SNIPPET], cwd=ROOT, env=env,
+            capture_output=True, text=True, timeout=args.timeout,
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            raise SystemExit("import app.main failed (import-time I/O?)")
+        import_s = float(proc.stdout.strip().splitlines()[-1])
+        samples.append((import_s, time.perf_counter() - start))
+
+    imports = [s[0] * 1000 for s in samples]
+    totals = [s[1] * 1000 for s in samples]
+    median = statistics.median(imports)
+    print(f"import app.main: median {median:.0f} ms, max {max(imports):.0f} ms "
+          f"(process total median {statistics.median(totals):.0f} ms, {args.runs} runs)")
+    if median > args.max_ms:
+        raise SystemExit(f"startup regression: median {median:.0f} ms > {args.max_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Check that complaint listing costs the same number of queries for 1 or N complaints.
+
+Calls GET /api/complaints/list with a page of one complaint and a page of N
+complaints (each with files attached), plus GET /api/complaints/{id}, and
+counts the SQL statements each request runs with a before_cursor_execute
+listener. Exits non-zero if the count grows with the page size (an N+1 file
+query). Use --seed on a database without enough complaints for the user.
+
+--sqlite runs against a throwaway SQLite file built from the models and
+seeded with --limit complaints, so no MariaDB (or MinIO) is needed: the
+statement count is the same on either database.
+
+    python -m benchmarks.check_list_queries --sqlite
+    python -m benchmarks.check_list_queries --seed 50 --user-id 1 --limit 50
+"""
+import argparse
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import BigInteger, event, insert
+from sqlalchemy.ext.compiler import compiles
+
+from app.config import settings
+from app.db import complaints, files
+from database.mariadb_connection import MariaDBBase
+from database.registry import registry
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns
+    return "INTEGER"
+
+
+def use_sqlite() -> str:
+    """Point the registry at a fresh SQLite file with every table created."""
+    path = os.path.join(tempfile.mkdtemp(prefix="minwon-queries-"), "check.db")
+    settings.DATABASE_URL = f"sqlite:///{path}"
+    settings.ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{path}"
+    MariaDBBase.metadata.create_all(registry.engine())
+    return path
+
+
+def seed(engine, count: int, user_id: int, files_per: int) -> None:
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for i in range(count):
+            complaint_id = conn.execute(insert(complaints).values(
+                user_id=user_id,
+                submission_type="TEXT_IMAGE",
+                original_text="query count",
+                status="SUBMITTED",
+                created_at=start + timedelta(minutes=i),
+                updated_at=start,
+            )).inserted_primary_key[0]
+            for _ in range(files_per):
+                stored = f"{uuid.uuid4().hex}.jpg"
+                conn.execute(insert(files).values(
+                    complaint_id=complaint_id,
+                    original_filename="photo.jpg",
+                    stored_filename=stored,
+                    file_type="IMAGE",
+                    minio_bucket=settings.MINIO_BUCKET,
+                    minio_object_key=f"complaints/{complaint_id}/{stored}",
+                    uploaded_at=start,
+                ))
+
+
+@contextmanager
+def count_queries():
+    """Count statements on whichever engine DB_MODE routes requests through."""
+    engine = registry.async_engine().sync_engine if settings.DB_MODE == "async" else registry.engine()
+    counter = {"n": 0}
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many complaints (with files) first")
+    parser.add_argument("--files-per", type=int, default=2)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=50, help="Page size for the N-complaint request (max 100)")
+    parser.add_argument("--sqlite", action="store_true", help="Run on a temporary SQLite database instead of DATABASE_URL")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        print(f"  using {use_sqlite()}")
+        args.seed = args.seed or args.limit
+    if args.seed:
+        seed(registry.engine(), args.seed, args.user_id, args.files_per)
+
+    from app.main import app
+    from app.auth import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": args.user_id, "roles": []}
+    client = TestClient(app)
+
+    counts = {}
+    for limit in (1, args.limit):
+        with count_queries() as counter:
+            resp = client.get("/api/complaints/list", params={"limit": limit})
+        resp.raise_for_status()
+        items = resp.json()["items"]
+        if len(items) < limit:
+            raise SystemExit(f"User {args.user_id} has only {len(items)} complaints; run with --seed {limit}")
+        counts[limit] = counter["n"]
+        print(f"  list limit={limit:<3} complaints={len(items):<3} files={sum(len(i['files']) for i in items):<4} queries={counter['n']}")
+
+    with count_queries() as counter:
+        client.get(f"/api/complaints/{items[0]['complaint_id']}").raise_for_status()
+    print(f"  get one complaint                   queries={counter['n']}")
+
+    if counts[args.limit] > counts[1]:
+        raise SystemExit(f"Query count grows with the page: {counts[1]} for 1 complaint, {counts[args.limit]} for {args.limit}")
+    print("ok  query count is independent of the number of complaints")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Check that every department-inbox query shape uses its intended index.
+
+Runs EXPLAIN for each combination of status filter, sort order and cursor,
+and exits non-zero unless the plan reads complaints through the expected
+index (ix_complaints_dept_status_created with a status filter,
+ix_complaints_dept_created without) with no sort outside it (filesort /
+temp B-tree). Use --seed on an empty database so the optimizer has data to
+plan against, and run `python -m database.migrate` first on a database
+created before the inbox indexes.
+
+--sqlite runs the same check on a throwaway SQLite database built from the
+models and seeded with --seed (default 20000) complaints, so no MariaDB is
+needed; a live MariaDB run is still the one that matters for production
+plans.
+
+    python -m benchmarks.explain_inbox --sqlite
+    python -m benchmarks.explain_inbox --seed 200000 --user-id 1
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app.db import categories, complaints, departments
+from app.routes.complaints import inbox_query
+from app.utils.pagination import encode_cursor
+from benchmarks.check_list_queries import use_sqlite
+from database.registry import registry
+
+STATUSES = ["DRAFT", "SUBMITTED", "PROCESSING", "COMPLETED"]
+
+
+def seed(engine, count: int, user_id: int, department_ids: list[int], batch: int = 5000) -> None:
+    rnd = random.Random(0)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, count, batch):
+            conn.execute(insert(complaints), [
+                {
+                    "user_id": user_id,
+                    "submission_type": "TEXT",
+                    "original_text": "explain",
+                    "department_id": rnd.choice(department_ids),
+                    "status": rnd.choice(STATUSES),
+                    "created_at": start + timedelta(minutes=rnd.randint(0, 500_000)),
+                    "updated_at": start,
+                }
+                for _ in range(min(batch, count - offset))
+            ])
+        if engine.dialect.name in ("mysql", "mariadb"):
+            conn.execute(text("ANALYZE TABLE complaints"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+
+def seed_reference(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(categories).values(category_id=1, name="explain", display_name="Explain"))
+        conn.execute(insert(departments), [
+            {"department_id": i, "category_id": 1, "name": f"Department {i}"} for i in range(1, 6)
+        ])
+
+
+def _problems(conn, dialect: str, stmt, expected: str) -> list[str]:
+    compiled = stmt.compile(dialect=conn.dialect)
+    if dialect == "sqlite":
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, tuple(compiled.params[k] for k in compiled.positiontup)).all()
+        details = [row[-1] for row in plan]
+        bad = [d for d in details if "TEMP B-TREE" in d]
+        if not any(f"USING INDEX {expected} " in d or f"USING COVERING INDEX {expected} " in d for d in details):
+            bad.append(f"expected {expected}, got: {' / '.join(details)}")
+        return bad
+
+    plan = conn.exec_driver_sql("EXPLAIN " + compiled.string, compiled.params).mappings().all()
+    bad = []
+    for row in plan:
+        if row["table"] != "complaints":
+            continue
+        if row["key"] != expected:
+            bad.append(f"expected {expected}, got key={row['key']} (type={row['type']})")
+        if "filesort" in (row["Extra"] or ""):
+            bad.append(f"filesort (key={row['key']})")
+    return bad
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--sqlite", action="store_true", help="Run on a temporary SQLite database instead of DATABASE_URL")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        print(f"  using {use_sqlite()}")
+        seed_reference(registry.engine())
+        args.seed = args.seed or 20000
+    engine = registry.engine()
+    with engine.connect() as conn:
+        department_ids = list(conn.execute(departments.select().with_only_columns(departments.c.department_id)).scalars())
+    if not department_ids:
+        raise SystemExit("No departments; seed reference data first")
+    if args.seed:
+        seed(engine, args.seed, args.user_id, department_ids)
+
+    cursor = encode_cursor(datetime(2024, 6, 1), 1000)
+    failures = 0
+    with engine.connect() as conn:
+        for status in (None, "SUBMITTED"):
+            for order in ("oldest", "newest"):
+                for cur in (None, cursor):
+                    stmt = inbox_query(department_ids[0], status, order, cur, 20)
+                    expected = "ix_complaints_dept_status_created" if status else "ix_complaints_dept_created"
+                    bad = _problems(conn, engine.dialect.name, stmt, expected)
+                    label = f"status={status or '-':<9} order={order:<6} cursor={'yes' if cur else 'no'}"
+                    print(f"{'FAIL' if bad else 'ok':>4}  {label}  {'; '.join(bad)}")
+                    failures += bool(bad)
+    if failures:
+        raise SystemExit(f"{failures} inbox query plan(s) miss their index or sort outside it")
+    print("ok  every inbox query shape uses its index")
+
+
+if __name__ == "__main__":
+    main()
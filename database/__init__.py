@@ -1,19 +1,27 @@
+from database.registry import registry
 from database.mariadb_connection import (
-    mariadb_engine,
     MariaDBSessionLocal,
     MariaDBBase
 )
 from database.postgresql_connection import (
-    postgresql_engine,
     PostgreSQLSessionLocal,
     PostgreSQLBase
 )
 
 __all__ = [
+    "registry",
     "mariadb_engine",
     "MariaDBSessionLocal",
     "MariaDBBase",
     "postgresql_engine",
     "PostgreSQLSessionLocal",
     "PostgreSQLBase"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name == "mariadb_engine":
+        return registry.engine("default")
+    if name == "postgresql_engine":
+        return registry.engine("postgresql")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
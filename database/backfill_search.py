@@ -0,0 +1,70 @@
+"""Add and backfill the complaints full-text search column on an existing database.
+
+    python -m database.backfill_search --batch 1000
+
+Adds `complaints.search_ngrams` and its FULLTEXT index if missing, then fills
+rows whose document is NULL in primary-key batches (safe to re-run).
+`database.migrate` runs both steps.
+"""
+import argparse
+
+from sqlalchemy import inspect, select, text, update, bindparam
+
+from app.db import complaints
+from app.utils.search_text import SEARCH_FIELDS, search_document
+from database.registry import registry
+
+
+def ensure_schema(engine) -> None:
+    insp = inspect(engine)
+    if "search_ngrams" not in {c["name"] for c in insp.get_columns("complaints")}:
+        print("[DEBUG] Adding complaints.search_ngrams")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE complaints ADD COLUMN search_ngrams MEDIUMTEXT NULL"))
+    if "ft_complaints_search" not in {i["name"] for i in insp.get_indexes("complaints")}:
+        print("[DEBUG] Creating FULLTEXT index ft_complaints_search")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE FULLTEXT INDEX ft_complaints_search ON complaints (search_ngrams)"))
+
+
+def backfill(engine, batch: int) -> int:
+    cols = [complaints.c.complaint_id, *(complaints.c[f] for f in SEARCH_FIELDS)]
+    stmt = (
+        update(complaints)
+        .where(complaints.c.complaint_id == bindparam("cid"))
+        .values(search_ngrams=bindparam("doc"))
+    )
+    done, last_id = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(*cols)
+                .where(complaints.c.complaint_id > last_id, complaints.c.search_ngrams.is_(None))
+                .order_by(complaints.c.complaint_id)
+                .limit(batch)
+            ).mappings().all()
+            if not rows:
+                return done
+            conn.execute(
+                stmt,
+                [{"cid": r["complaint_id"], "doc": search_document(r)} for r in rows],
+            )
+        done += len(rows)
+        last_id = rows[-1]["complaint_id"]
+        print(f"[DEBUG] Backfilled {done} complaints (last id {last_id})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--skip-ddl", action="store_true", help="Only backfill; the column and index already exist")
+    args = parser.parse_args()
+
+    engine = registry.engine()
+    if not args.skip_ddl:
+        ensure_schema(engine)
+    print(f"✅ Backfilled {backfill(engine, args.batch)} complaints")
+
+
+if __name__ == "__main__":
+    main()
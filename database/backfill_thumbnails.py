@@ -0,0 +1,64 @@
+"""Add `files.variants` and generate image variants for files uploaded before it existed.
+
+    python -m database.backfill_thumbnails --batch 100
+
+Adds the column if missing, then runs every IMAGE file whose variants are
+NULL through the thumbnail pipeline in primary-key batches (safe to re-run;
+files that fail stay NULL and are retried next run). `database.migrate`
+adds the column; rendering stays a separate job since it reads MinIO.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import inspect, select, text
+
+from app.db import files
+from app.utils.thumbnails import thumbnail_pipeline
+from database.registry import registry
+
+
+def ensure_schema(engine) -> None:
+    if "variants" not in {c["name"] for c in inspect(engine).get_columns("files")}:
+        print("[DEBUG] Adding files.variants")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE files ADD COLUMN variants JSON NULL"))
+
+
+async def backfill(engine, batch: int) -> int:
+    done, last_id = 0, 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(files)
+                .where(files.c.file_id > last_id, files.c.file_type == "IMAGE", files.c.variants.is_(None))
+                .order_by(files.c.file_id)
+                .limit(batch)
+            ).mappings().all()
+        if not rows:
+            return done
+        done += await thumbnail_pipeline.generate([dict(r) for r in rows])
+        last_id = rows[-1]["file_id"]
+        print(f"[DEBUG] Generated variants for {done} files (last id {last_id})")
+
+
+async def _run(args) -> int:
+    try:
+        return await backfill(registry.engine(), args.batch)
+    finally:
+        thumbnail_pipeline.shutdown()
+        await registry.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--skip-ddl", action="store_true", help="Only backfill; the column already exists")
+    args = parser.parse_args()
+
+    if not args.skip_ddl:
+        ensure_schema(registry.engine())
+    print(f"✅ Generated variants for {asyncio.run(_run(args))} files")
+
+
+if __name__ == "__main__":
+    main()
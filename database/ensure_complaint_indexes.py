@@ -0,0 +1,40 @@
+"""Create the composite `complaints` indexes the listing queries rely on, if missing.
+
+    python -m database.ensure_complaint_indexes
+
+Tables created by `Base.metadata.create_all` already have them; on existing
+databases `database.migrate` runs this step. Safe to re-run.
+"""
+from sqlalchemy import inspect
+
+from app.db import complaints
+from database.registry import registry
+
+INDEXES = (
+    # Keyset pagination for /api/complaints/list
+    "ix_complaints_user_created",
+    # Department inbox, with and without a status filter
+    "ix_complaints_dept_status_created",
+    "ix_complaints_dept_created",
+)
+
+
+def ensure_indexes(engine) -> list[str]:
+    existing = {i["name"] for i in inspect(engine).get_indexes(complaints.name)}
+    declared = {i.name: i for i in complaints.indexes}
+    created = []
+    for name in INDEXES:
+        if name not in existing:
+            print(f"[DEBUG] Creating index {name}")
+            declared[name].create(engine)
+            created.append(name)
+    return created
+
+
+def main() -> None:
+    created = ensure_indexes(registry.engine())
+    print(f"✅ Complaint indexes in place ({len(created)} created)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,17 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-from dotenv import load_dotenv
-import os
+from sqlalchemy.orm import sessionmaker, declarative_base
 
-load_dotenv()
+from database.registry import registry
 
-MARIADB_USER = os.getenv("MARIADB_USER")
-MARIADB_PASSWORD = os.getenv("MARIADB_PASSWORD")
-MARIADB_HOST = os.getenv("MARIADB_HOST")
-MARIADB_PORT = os.getenv("MARIADB_PORT")
-MARIADB_DATABASE = os.getenv("MARIADB_DATABASE")
+_MariaDBSession = sessionmaker(autocommit=False, autoflush=False)
+MariaDBBase = declarative_base()
 
-MARIADB_URL = f'mysql+pymysql://{MARIADB_USER}:{MARIADB_PASSWORD}@{MARIADB_HOST}:{MARIADB_PORT}/{MARIADB_DATABASE}?charset=utf8mb4'
 
-mariadb_engine = create_engine(MARIADB_URL, echo=True)
-MariaDBSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=mariadb_engine)
-MariaDBBase = declarative_base()
+def MariaDBSessionLocal(**kwargs):
+    return _MariaDBSession(bind=registry.engine("default"), **kwargs)
+
 
+def __getattr__(name):
+    # Engine is built lazily by the registry on first access
+    if name == "mariadb_engine":
+        return registry.engine("default")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,68 @@
+"""Bring an existing database up to the schema the models declare, in order.
+
+    python -m database.migrate [--ddl-only] [--batch 1000]
+
+The one migration to run before deploying; the API refuses to start while
+the schema is behind (DB_SCHEMA_CHECK). Steps, each a no-op once applied:
+
+  1. missing tables (complaint_stats_daily, object_tombstones, ...)
+  2. complaints.search_ngrams and its FULLTEXT index
+  3. files.content_sha256, and the minio_object_key UNIQUE key made a plain index
+  4. files.variants
+  5. composite complaints indexes for listing and the department inbox
+  6. backfill search documents, rebuild complaint_stats_daily (skipped by --ddl-only)
+
+Optional MinIO-side jobs stay separate and can run any time afterwards:
+`database.migrate_file_dedup --move-existing`, `database.backfill_thumbnails`
+and `database.reconcile_objects`.
+"""
+import argparse
+
+from sqlalchemy import inspect
+
+from app.db import schema_gaps
+from app.utils.complaint_stats import rebuild_complaint_stats
+from database import backfill_search, backfill_thumbnails, ensure_complaint_indexes, migrate_file_dedup
+from database.mariadb_connection import MariaDBBase
+from database.registry import registry
+
+
+def create_tables(engine) -> None:
+    existing = set(inspect(engine).get_table_names())
+    for table in MariaDBBase.metadata.sorted_tables:
+        if table.name not in existing:
+            print(f"[DEBUG] Creating {table.name}")
+            table.create(engine)
+
+
+STEPS = (
+    create_tables,
+    backfill_search.ensure_schema,
+    migrate_file_dedup.ensure_schema,
+    backfill_thumbnails.ensure_schema,
+    ensure_complaint_indexes.ensure_indexes,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ddl-only", action="store_true", help="Only apply schema changes (steps 1-5)")
+    parser.add_argument("--batch", type=int, default=1000, help="Rows per search backfill batch")
+    args = parser.parse_args()
+
+    engine = registry.engine()
+    for step in STEPS:
+        step(engine)
+    gaps = schema_gaps(engine)
+    if gaps:
+        raise SystemExit(f"Schema still behind the models: {', '.join(gaps)}")
+    print("✅ Schema up to date")
+
+    if not args.ddl_only:
+        print(f"✅ Backfilled {backfill_search.backfill(engine, args.batch)} search documents")
+        with engine.begin() as conn:
+            print(f"✅ Rebuilt complaint_stats_daily ({rebuild_complaint_stats(conn)} buckets)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Prepare an existing database for content-deduplicated attachments.
+
+    python -m database.migrate_file_dedup [--move-existing] [--batch 200]
+
+Adds `files.content_sha256` and its index, and turns the UNIQUE key on
+`files.minio_object_key` into a plain index (deduplicated files share a
+blob); `database.migrate` runs this step. New uploads only deduplicate against content-addressed `blobs/<sha256>`
+objects. With --move-existing, files uploaded before this change are hashed
+and copied to their blob, their rows repointed and the old objects (and
+variants) queued for the reaper; run `database.backfill_thumbnails` afterwards
+to re-render variants. Presigned uploads in MINIO_BUCKET are moved too. Safe
+to re-run; only rows outside blobs/ are read.
+"""
+import argparse
+import hashlib
+
+from sqlalchemy import inspect, select, text, update, insert, delete
+
+from app.db import files, object_tombstones
+from app.routes.files import BLOB_PREFIX, MINIO_BUCKET, blob_key, copy_to_blob, read_object
+from app.utils.object_gc import tombstones_for
+from database.registry import registry
+
+
+def ensure_schema(engine) -> None:
+    insp = inspect(engine)
+    if "content_sha256" not in {c["name"] for c in insp.get_columns("files")}:
+        print("[DEBUG] Adding files.content_sha256")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE files ADD COLUMN content_sha256 VARCHAR(64) NULL"))
+
+    indexes = insp.get_indexes("files")
+    uniques = [u["name"] for u in insp.get_unique_constraints("files") if u["column_names"] == ["minio_object_key"]]
+    uniques += [i["name"] for i in indexes if i["unique"] and i["column_names"] == ["minio_object_key"]]
+    names = {i["name"] for i in indexes}
+    with engine.begin() as conn:
+        for name in dict.fromkeys(uniques):
+            print(f"[DEBUG] Dropping unique key {name} on files.minio_object_key")
+            conn.execute(text(f"DROP INDEX {name} ON files"))
+        if "ix_files_minio_object_key" not in names:
+            print("[DEBUG] Creating index ix_files_minio_object_key")
+            conn.execute(text("CREATE INDEX ix_files_minio_object_key ON files (minio_object_key)"))
+        if "ix_files_content_sha256" not in names:
+            print("[DEBUG] Creating index ix_files_content_sha256")
+            conn.execute(text("CREATE INDEX ix_files_content_sha256 ON files (content_sha256)"))
+
+
+def move_existing(engine, batch: int) -> int:
+    done, last_id = 0, 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(files.c.file_id, files.c.minio_bucket, files.c.minio_object_key, files.c.variants)
+                .where(
+                    files.c.file_id > last_id,
+                    files.c.minio_bucket == MINIO_BUCKET,
+                    files.c.minio_object_key.not_like(f"{BLOB_PREFIX}%"),
+                )
+                .order_by(files.c.file_id)
+                .limit(batch)
+            ).mappings().all()
+        if not rows:
+            return done
+        # Rows sharing an object are repointed together
+        for r in {r["minio_object_key"]: r for r in rows}.values():
+            try:
+                digest = hashlib.sha256(read_object(r["minio_bucket"], r["minio_object_key"])).hexdigest()
+                # Same order as the upload path: cancel a pending reap of the blob before writing it
+                with engine.begin() as conn:
+                    conn.execute(delete(object_tombstones).where(
+                        object_tombstones.c.minio_bucket == MINIO_BUCKET,
+                        object_tombstones.c.minio_object_key == blob_key(digest),
+                    ))
+                copy_to_blob(r["minio_object_key"], digest)
+            except Exception as e:
+                print(f"[WARN] Skipping file {r['file_id']}: {e}")
+                continue
+            with engine.begin() as conn:
+                moved = conn.execute(
+                    update(files)
+                    .where(files.c.minio_bucket == MINIO_BUCKET, files.c.minio_object_key == r["minio_object_key"])
+                    .values(minio_object_key=blob_key(digest), content_sha256=digest, variants=None)
+                ).rowcount
+                conn.execute(insert(object_tombstones), tombstones_for([r]))
+            done += moved
+        last_id = rows[-1]["file_id"]
+        print(f"[DEBUG] Moved {done} files to blobs (last id {last_id})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--move-existing", action="store_true", help="Move files uploaded before dedup to blobs/")
+    args = parser.parse_args()
+
+    engine = registry.engine()
+    ensure_schema(engine)
+    if args.move_existing:
+        print(f"✅ Moved {move_existing(engine, args.batch)} files")
+
+
+if __name__ == "__main__":
+    main()
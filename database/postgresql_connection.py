@@ -1,22 +1,17 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-from dotenv import load_dotenv
-import os
+from sqlalchemy.orm import sessionmaker, declarative_base
 
-load_dotenv()
+from database.registry import registry
 
-# PostgreSQL 환경변수
-POSTGRES_USER = os.getenv("POSTGRES_USER")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-POSTGRES_HOST = os.getenv("POSTGRES_HOST")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT")
-POSTGRES_DATABASE = os.getenv("POSTGRES_DATABASE")
+_PostgreSQLSession = sessionmaker(autocommit=False, autoflush=False)
+PostgreSQLBase = declarative_base()
 
 
-POSTGRESQL_URL = f'postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}'
+def PostgreSQLSessionLocal(**kwargs):
+    return _PostgreSQLSession(bind=registry.engine("postgresql"), **kwargs)
 
-postgresql_engine = create_engine(POSTGRESQL_URL, echo=True)
-PostgreSQLSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=postgresql_engine)
-PostgreSQLBase = declarative_base()
 
+def __getattr__(name):
+    # Engine is built lazily by the registry on first access
+    if name == "postgresql_engine":
+        return registry.engine("postgresql")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,32 @@
+"""Create (if missing) and rebuild the complaint statistics summary table from `complaints`.
+
+    python -m database.rebuild_complaint_stats
+
+`database.migrate` creates and rebuilds the table before deploying (complaint
+writes upsert into it and fail while it is missing). On its own it
+reconciles any drift (e.g. rows changed outside the API). Safe to run from
+cron.
+"""
+from sqlalchemy import inspect
+
+from app.db import complaint_stats
+from app.utils.complaint_stats import rebuild_complaint_stats
+from database.registry import registry
+
+
+def ensure_schema(engine) -> None:
+    if not inspect(engine).has_table(complaint_stats.name):
+        print(f"[DEBUG] Creating {complaint_stats.name}")
+        complaint_stats.create(engine)
+
+
+def main() -> None:
+    engine = registry.engine()
+    ensure_schema(engine)
+    with engine.begin() as conn:
+        buckets = rebuild_complaint_stats(conn)
+    print(f"✅ Rebuilt complaint_stats_daily ({buckets} buckets)")
+
+
+if __name__ == "__main__":
+    main()
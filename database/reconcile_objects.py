@@ -0,0 +1,63 @@
+"""Find and remove MinIO objects that no `files` row references.
+
+    python -m database.reconcile_objects [--prefix blobs/] [--start-after KEY] [--reap]
+    python -m database.reconcile_objects --ddl-only
+
+Creates the object_tombstones table if missing (`database.migrate` does
+too; complaint deletes queue their objects there).
+
+Lists objects under each prefix (default: complaints/ and blobs/) and queues
+unreferenced ones older than GC_ORPHAN_MIN_AGE as tombstones (e.g. leftovers
+of complaints deleted before the reaper existed, presigned uploads that were
+never confirmed, or staged streaming uploads of a crashed worker). An
+interrupted scan resumes from the last key it reported via --start-after.
+With --reap, due tombstones are then removed right away (paced to GC_RATE)
+instead of waiting for the API's reaper. Safe to run from cron.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import inspect
+
+from app.db import object_tombstones
+from app.utils.object_gc import object_reaper
+from database.registry import registry
+
+# Staged and presigned uploads live under complaints/, deduplicated content under blobs/
+DEFAULT_PREFIXES = ("complaints/", "blobs/")
+
+
+def ensure_schema(engine) -> None:
+    if not inspect(engine).has_table(object_tombstones.name):
+        print(f"[DEBUG] Creating {object_tombstones.name}")
+        object_tombstones.create(engine)
+
+
+async def _run(args) -> None:
+    try:
+        for prefix in args.prefix or DEFAULT_PREFIXES:
+            # A resume key only applies to the listing it came from
+            start_after = args.start_after if args.start_after and args.start_after.startswith(prefix) else None
+            counts = await object_reaper.reconcile(prefix, start_after)
+            print(f"✅ Scanned {counts['scanned']} objects under {prefix}, queued {counts['queued']} orphans")
+        if args.reap:
+            print(f"✅ Reaped {await object_reaper.drain()} tombstones")
+    finally:
+        await registry.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", action="append", help="Only scan this prefix (repeatable)")
+    parser.add_argument("--start-after", default=None, help="Resume the listing after this object key")
+    parser.add_argument("--reap", action="store_true", help="Remove due tombstones after the scan")
+    parser.add_argument("--ddl-only", action="store_true", help="Only create the tombstone table")
+    args = parser.parse_args()
+
+    ensure_schema(registry.engine())
+    if not args.ddl_only:
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from app.config import settings
+
+
+class PoolWaitStats:
+    """Time spent waiting to check a connection out of the pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class _WaitTimingMixin:
+    wait_stats: PoolWaitStats | None = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.wait_stats is not None:
+                self.wait_stats.record(time.perf_counter() - start, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class EngineRegistry:
+    """One lazily built engine per database, configured from Settings.
+
+    Engines are created on first use and, like every SQLAlchemy engine, only
+    open connections when a connection is first checked out.
+    """
+
+    def __init__(self):
+        self._engines: dict = {}
+        self._lock = threading.Lock()
+
+    def _url(self, name: str, is_async: bool) -> str:
+        if name == "default":
+            return settings.async_database_url if is_async else (settings.DATABASE_URL or settings.mariadb_url)
+        if name == "postgresql":
+            return settings.postgresql_url
+        raise KeyError(f"[DB] Unknown database: {name}")
+
+    def _build(self, name: str, is_async: bool):
+        kwargs = dict(
+            echo=settings.DB_ECHO,
+            pool_pre_ping=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        if is_async:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            eng = create_async_engine(self._url(name, True), poolclass=InstrumentedAsyncQueuePool, **kwargs)
+            eng.sync_engine.pool.wait_stats = PoolWaitStats()
+        else:
+            eng = create_engine(self._url(name, False), poolclass=InstrumentedQueuePool, **kwargs)
+            eng.pool.wait_stats = PoolWaitStats()
+        return eng
+
+    def _get(self, name: str, is_async: bool):
+        key = (name, is_async)
+        eng = self._engines.get(key)
+        if eng is None:
+            with self._lock:
+                eng = self._engines.get(key)
+                if eng is None:
+                    eng = self._engines[key] = self._build(name, is_async)
+        return eng
+
+    def engine(self, name: str = "default") -> Engine:
+        return self._get(name, False)
+
+    def async_engine(self, name: str = "default"):
+        return self._get(name, True)
+
+    def pool_stats(self) -> dict:
+        stats = {}
+        for (name, is_async), eng in list(self._engines.items()):
+            pool = eng.sync_engine.pool if is_async else eng.pool
+            stats[f"{name}{'-async' if is_async else ''}"] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                **pool.wait_stats.snapshot(),
+            }
+        return stats
+
+    async def dispose(self) -> None:
+        for (_, is_async), eng in list(self._engines.items()):
+            if is_async:
+                await eng.dispose()
+            else:
+                eng.dispose()
+
+
+registry = EngineRegistry()